@@ -40,6 +40,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "festival.middleware.RequestPerfMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -48,9 +49,12 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "festival.middleware.ProfileMiddleware",
 ]
 
-ROOT_URLCONF = "cipriano.urls"
+# WEB_POOL=scan serves only the scan stations (see cipriano/urls_scan.py).
+WEB_POOL = os.getenv("WEB_POOL", "all")
+ROOT_URLCONF = "cipriano.urls_scan" if WEB_POOL == "scan" else "cipriano.urls"
 
 TEMPLATES = [
     {
@@ -82,6 +86,18 @@ DATABASES = {
     }
 }
 
+# Per-process caches. The sales timeseries keeps one key per settled 5-minute bucket
+# (288 for a 24 h window, per branding and sales generation), so it gets its own
+# alias and cannot cull the dashboard entries of the default cache.
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "timeseries": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "timeseries",
+        "OPTIONS": {"MAX_ENTRIES": int(os.getenv("TIMESERIES_CACHE_MAX_ENTRIES", "5000"))},
+    },
+}
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = "es-ar"
@@ -108,6 +124,26 @@ REST_FRAMEWORK = {
 ADMIN_ACTIONS_PIN = env_value("ADMIN_ACTIONS_PIN", "1234")
 ADMIN_OVERRIDE_PIN = env_value("ADMIN_OVERRIDE_PIN", ADMIN_ACTIONS_PIN)
 AUTH_SESSION_MINUTES = int(os.getenv("AUTH_SESSION_MINUTES", "480"))
+SCAN_DEDUPE_WINDOW_SECONDS = int(os.getenv("SCAN_DEDUPE_WINDOW_SECONDS", "3"))
+SCAN_RECEIPT_TTL_HOURS = int(os.getenv("SCAN_RECEIPT_TTL_HOURS", "24"))
+# Prune expired receipts every N receipts; 0 never prunes.
+SCAN_RECEIPT_PRUNE_EVERY = int(os.getenv("SCAN_RECEIPT_PRUNE_EVERY", "500"))
+DASHBOARD_CACHE_SECONDS = int(os.getenv("DASHBOARD_CACHE_SECONDS", "2"))
+PERF_RING_SIZE = int(os.getenv("PERF_RING_SIZE", "2000"))
+METRICS_DIR = os.getenv("METRICS_DIR", "/tmp/festival-metrics")
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+PROFILE_DIR = os.getenv("PROFILE_DIR", str(BASE_DIR / "profiles"))
+PROFILE_MAX_FILES = int(os.getenv("PROFILE_MAX_FILES", "50"))
+SLOW_REQUEST_MS = int(os.getenv("SLOW_REQUEST_MS", "1000"))
+SLOW_QUERY_MS = int(os.getenv("SLOW_QUERY_MS", "200"))
+SLOW_LOG_PATH = os.getenv("SLOW_LOG_PATH", str(BASE_DIR / "logs" / "slow.jsonl"))
+SLOW_LOG_MAX_BYTES = int(os.getenv("SLOW_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_LOG_BACKUPS = int(os.getenv("SLOW_LOG_BACKUPS", "5"))
+SLOW_LOG_PARAMS = os.getenv("SLOW_LOG_PARAMS", "0") == "1"
+HEAVY_JOB_SLOTS = int(os.getenv("HEAVY_JOB_SLOTS", "2"))
+INVENTORY_JOB_SLOTS = int(os.getenv("INVENTORY_JOB_SLOTS", "2"))
+HEAVY_JOB_RETRY_AFTER = int(os.getenv("HEAVY_JOB_RETRY_AFTER", "15"))
+HEAVY_JOB_LOCK_DIR = os.getenv("HEAVY_JOB_LOCK_DIR", "/tmp/festival-heavy")
 
 DEFAULT_FESTIVAL_KITCHEN_PIN = env_value("DEFAULT_FESTIVAL_KITCHEN_PIN", env_value("DEFAULT_KITCHEN_PIN", "1111"))
 DEFAULT_FESTIVAL_SALES_PIN = env_value("DEFAULT_FESTIVAL_SALES_PIN", env_value("DEFAULT_SALES_PIN", "2222"))
@@ -0,0 +1,35 @@
+"""URLs served by the scan pool (WEB_POOL=scan).
+
+Only what the kitchen and sales stations need: login, the station pages, the
+scan APIs and the waiter list. Reports, labels and exports stay on the main
+pool, so a long PDF or export never holds a worker that a scan is waiting for.
+/app/ sends each role to its station, and every other route answers with a
+"scan pool only" page (JSON under /api/) instead of a bare 404.
+"""
+from django.urls import path, re_path
+
+from festival import views
+from festival.urls import urlpatterns as festival_urlpatterns
+
+SCAN_POOL_URL_NAMES = {
+    "landing",
+    "login-legacy",
+    "festival-login",
+    "don-login",
+    "logout",
+    "branding-select",
+    "kitchen",
+    "sales",
+    "api-scan",
+    "api-scan-batch",
+    "api-scan-replay",
+    "api-kitchen-bulk-ready",
+    "api-waiters",
+    "metrics",
+}
+
+urlpatterns = [
+    *(pattern for pattern in festival_urlpatterns if pattern.name in SCAN_POOL_URL_NAMES),
+    path("app/", views.scan_pool_home_view, name="home"),
+    re_path(r"^(?P<path>.*)$", views.scan_pool_only_view, name="scan-pool-only"),
+]
@@ -8,6 +8,15 @@ if [ "${DB_ENGINE}" = "django.db.backends.postgresql" ]; then
   done
 fi
 
+# Samples of /metrics are per worker pid; start each deploy from zero.
+rm -rf "${METRICS_DIR:-/tmp/festival-metrics}"
+
+if [ "${WEB_POOL}" = "scan" ]; then
+  # Scan pool: migrations are run by the main pool.
+  python manage.py collectstatic --noinput
+  exec gunicorn cipriano.wsgi:application --bind 0.0.0.0:8001 --workers "${SCAN_WORKERS:-2}" --timeout 30
+fi
+
 python manage.py migrate --noinput
 python manage.py collectstatic --noinput
 
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import Batch, Flavor, Operator, PizzaItem, ScanEvent, TransferRecord, Waiter
+from .models import Batch, BulkOperation, Flavor, Operator, PizzaItem, SalesRollup, ScanEvent, TransferRecord, Waiter
 
 
 @admin.register(PizzaItem)
@@ -62,3 +62,17 @@ class TransferRecordAdmin(admin.ModelAdmin):
     list_display = ("branding", "first_id", "last_id", "quantity", "from_location", "to_location", "created_by", "created_at")
     list_filter = ("branding", "from_location", "to_location")
     search_fields = ("first_id", "last_id", "created_by")
+
+
+@admin.register(BulkOperation)
+class BulkOperationAdmin(admin.ModelAdmin):
+    list_display = ("kind", "branding", "first_id", "last_id", "quantity", "created_by", "created_at")
+    list_filter = ("branding", "kind")
+    search_fields = ("first_id", "last_id", "created_by")
+
+
+@admin.register(SalesRollup)
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ("hour", "branding", "flavor", "sold_location", "sold_by", "sold_count", "revenue")
+    list_filter = ("branding", "sold_location", "flavor")
+    search_fields = ("flavor", "sold_by")
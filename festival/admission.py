@@ -0,0 +1,78 @@
+"""Admission control for heavy downloads (label PDFs, exports) and inventory.
+
+With three sync gunicorn workers, long downloads leave few workers for the
+scans. Each slot class caps how many of its jobs run at once across all
+workers: HEAVY_JOB_SLOTS for label PDFs and exports, INVENTORY_JOB_SLOTS for
+full inventory responses, which every scan invalidates and the inventory
+screens poll. A request that finds no free slot is turned away instead of
+queued.
+
+Each slot is an flock on a file in HEAVY_JOB_LOCK_DIR, so a slot is freed as
+soon as its worker finishes or dies, with no cleanup. Without fcntl (Windows
+dev boxes) the cap is per process.
+"""
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.conf import settings
+
+from . import metrics
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DOWNLOADS = "descargas"
+INVENTORY = "inventario"
+
+_local_slots: dict[str, threading.BoundedSemaphore] = {}
+_local_lock = threading.Lock()
+
+
+def _slot_count(pool: str) -> int:
+    return settings.INVENTORY_JOB_SLOTS if pool == INVENTORY else settings.HEAVY_JOB_SLOTS
+
+
+def _acquire(pool: str):
+    if fcntl is None:
+        with _local_lock:
+            slots = _local_slots.setdefault(pool, threading.BoundedSemaphore(_slot_count(pool)))
+        return slots if slots.acquire(blocking=False) else None
+    directory = Path(settings.HEAVY_JOB_LOCK_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    for index in range(_slot_count(pool)):
+        handle = open(directory / f"{pool}-{index}.lock", "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            handle.close()
+            continue
+        return handle
+    return None
+
+
+def _release(handle) -> None:
+    if fcntl is None:
+        handle.release()
+        return
+    fcntl.flock(handle, fcntl.LOCK_UN)
+    handle.close()
+
+
+@contextmanager
+def heavy_slot(kind: str, *, pool: str = DOWNLOADS):
+    """Yield True while holding a slot of `pool`, or False if none is free."""
+    if _slot_count(pool) <= 0:
+        yield True
+        return
+    handle = _acquire(pool)
+    if handle is None:
+        metrics.HEAVY_REJECTED.inc(kind=kind)
+        yield False
+        return
+    try:
+        yield True
+    finally:
+        _release(handle)
@@ -0,0 +1,191 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.cache import caches
+from django.db import connection
+from django.db.models import FloatField, Func, Max
+from django.db.models.functions import ExtractHour
+from django.utils import timezone
+
+from .models import PizzaItem, PizzaStatus, ScanEvent
+
+TIMESERIES_BUCKET_MINUTES = 5
+# Sales commit a moment after sold_at is stamped; only cache buckets that closed before this.
+TIMESERIES_SETTLE_SECONDS = 60
+TIMESERIES_CACHE_SECONDS = 24 * 60 * 60
+
+
+def bucket_floor(moment: datetime) -> datetime:
+    step = TIMESERIES_BUCKET_MINUTES * 60
+    epoch = int(moment.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % step, tz=dt_timezone.utc)
+
+
+def _sales_generation(branding: str) -> int:
+    # Closed buckets only change when a sale is taken back (admin status, undo, override resale),
+    # and each of those leaves an event starting from VENDIDA.
+    return (
+        ScanEvent.objects.filter(branding=branding, from_status=PizzaStatus.VENDIDA)
+        .aggregate(last=Max("id"))
+        .get("last")
+        or 0
+    )
+
+
+def _compute_buckets(branding: str, start: datetime, end: datetime) -> dict[datetime, list[dict]]:
+    grouped: dict[datetime, dict[tuple[str, str], list]] = {}
+    rows = PizzaItem.objects.filter(
+        branding=branding,
+        status=PizzaStatus.VENDIDA,
+        sold_at__gte=start,
+        sold_at__lt=end,
+    ).values_list("sold_at", "flavor", "sold_location", "price")
+    for sold_at, flavor, sold_location, price in rows:
+        totals = grouped.setdefault(bucket_floor(sold_at), {}).setdefault((flavor, sold_location), [0, Decimal("0")])
+        totals[0] += 1
+        totals[1] += price or Decimal("0")
+
+    step = timedelta(minutes=TIMESERIES_BUCKET_MINUTES)
+    buckets: dict[datetime, list[dict]] = {}
+    bucket = start
+    while bucket < end:
+        buckets[bucket] = [
+            {"flavor": flavor, "location": sold_location, "count": count, "revenue": str(revenue)}
+            for (flavor, sold_location), (count, revenue) in sorted(grouped.get(bucket, {}).items())
+        ]
+        bucket += step
+    return buckets
+
+
+def sales_timeseries(*, branding: str, start: datetime, end: datetime) -> list[tuple[datetime, list[dict]]]:
+    """Sold count and revenue per flavor/location in 5-minute buckets for [start, end).
+
+    Settled buckets are cached per sales generation, so a poll normally only
+    queries the newest bucket or two.
+    """
+    start, end = bucket_floor(start), bucket_floor(end)
+    step = timedelta(minutes=TIMESERIES_BUCKET_MINUTES)
+    settled_end = min(end, bucket_floor(timezone.now() - timedelta(seconds=TIMESERIES_SETTLE_SECONDS)))
+    generation = _sales_generation(branding)
+
+    keys = {}
+    bucket = start
+    while bucket < settled_end:
+        keys[f"sales-ts:{branding}:{generation}:{int(bucket.timestamp())}"] = bucket
+        bucket += step
+    cache = caches["timeseries"]
+    cached = cache.get_many(list(keys))
+    buckets = {keys[key]: rows for key, rows in cached.items()}
+
+    missing = [bucket for key, bucket in keys.items() if key not in cached]
+    if missing:
+        computed = _compute_buckets(branding, missing[0], missing[-1] + step)
+        cache.set_many(
+            {key: computed[bucket] for key, bucket in keys.items() if key not in cached},
+            TIMESERIES_CACHE_SECONDS,
+        )
+        buckets.update({bucket: computed[bucket] for bucket in missing})
+    if settled_end < end:
+        buckets.update(_compute_buckets(branding, max(start, settled_end), end))
+    return sorted(buckets.items())
+
+
+KITCHEN_PERCENTILES = (50, 90, 95)
+# Report key -> PARTITION BY column of its window.
+KITCHEN_BUCKETS = {"overall": "", "by_flavor": "flavor", "by_hour": "hour"}
+
+
+class DurationSeconds(Func):
+    """Seconds from the second expression to the first, in native SQL.
+
+    Django's datetime subtraction and extraction run as Python functions on
+    SQLite, once per row; this keeps the duration in the database engine.
+    """
+
+    arity = 2
+    output_field = FloatField()
+    template = "EXTRACT(EPOCH FROM %(expressions)s)"
+    arg_joiner = " - "
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return self.as_sql(
+            compiler,
+            connection,
+            template="((julianday(%(expressions)s)) * 86400.0)",
+            arg_joiner=") - julianday(",
+            **extra_context,
+        )
+
+
+def _duration_percentiles(queryset, *, start_field: str, end_field: str) -> dict:
+    # Nearest-rank percentiles: ROW_NUMBER and COUNT over each bucket, keeping only
+    # the rows at rank ceil(n * p / 100). One query serves the overall, per-flavor
+    # and per-hour buckets, and only the picked rows leave the database. The windows
+    # run over a subquery so the hour and duration are computed once per row.
+    base_sql, params = (
+        queryset.filter(**{f"{start_field}__isnull": False, f"{end_field}__isnull": False})
+        .annotate(seconds=DurationSeconds(end_field, start_field), hour=ExtractHour(end_field))
+        .values("pk", "flavor", "hour", "seconds")
+        .query.sql_with_params()
+    )
+    windows, picks = [], []
+    for name, partition in KITCHEN_BUCKETS.items():
+        over = f"PARTITION BY {partition} " if partition else ""
+        windows.append(f"ROW_NUMBER() OVER ({over}ORDER BY seconds, id) AS {name}_position")
+        windows.append(f"COUNT(*) OVER ({over.strip()}) AS {name}_size")
+        picks += [f"{name}_position = ({name}_size * {percentile} + 99) / 100" for percentile in KITCHEN_PERCENTILES]
+    sql = (
+        f"SELECT * FROM (SELECT flavor, hour, seconds, {', '.join(windows)} FROM ({base_sql}) base) ranked "
+        f"WHERE {' OR '.join(picks)}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        picked = [dict(zip(columns, values)) for values in cursor.fetchall()]
+
+    results: dict[str, dict] = {name: {} for name in KITCHEN_BUCKETS}
+    for row in picked:
+        # Postgres returns EXTRACT() as numeric.
+        row["hour"] = int(row["hour"]) if row["hour"] is not None else None
+        for name in KITCHEN_BUCKETS:
+            bucket_value = {"overall": "ALL", "by_flavor": row["flavor"], "by_hour": row["hour"]}[name]
+            size, position = row[f"{name}_size"], row[f"{name}_position"]
+            bucket = results[name].setdefault(bucket_value, {"bucket": bucket_value, "count": size})
+            for percentile in KITCHEN_PERCENTILES:
+                if position == (size * percentile + 99) // 100:
+                    bucket[f"p{percentile}_seconds"] = round(row["seconds"])
+    return {
+        name: [rows[key] for key in sorted(rows, key=lambda value: (value is None, value))]
+        for name, rows in results.items()
+    }
+
+
+def kitchen_times(*, branding: str, start: datetime | None = None, end: datetime | None = None) -> dict:
+    """Prep (created -> ready) and dwell (ready -> sold) percentiles overall,
+    per flavor and per local hour.
+
+    Prep is bucketed by the hour the pizza was marked ready, dwell by the hour
+    it was sold.
+    """
+    items = PizzaItem.objects.filter(branding=branding)
+    prep_items = items
+    dwell_items = items.filter(status=PizzaStatus.VENDIDA)
+    if start:
+        prep_items = prep_items.filter(ready_at__gte=start)
+        dwell_items = dwell_items.filter(sold_at__gte=start)
+    if end:
+        prep_items = prep_items.filter(ready_at__lt=end)
+        dwell_items = dwell_items.filter(sold_at__lt=end)
+
+    report = {}
+    for name, queryset, start_field, end_field in (
+        ("prep", prep_items, "created_at", "ready_at"),
+        ("dwell", dwell_items, "ready_at", "sold_at"),
+    ):
+        buckets = _duration_percentiles(queryset, start_field=start_field, end_field=end_field)
+        report[name] = {
+            "overall": buckets["overall"][0] if buckets["overall"] else {"bucket": "ALL", "count": 0},
+            "by_flavor": buckets["by_flavor"],
+            "by_hour": buckets["by_hour"],
+        }
+    return report
@@ -0,0 +1,375 @@
+"""Closed-loop load generator that plays a festival night against a running server.
+
+Every virtual station is a thread with its own session: it sends a request,
+waits for the answer, thinks, and goes again. Pizzas flow between stations
+the way they do on the night: the batch station generates batches (and
+downloads their labels), kitchens scan them, sales sell them to waiters,
+some batch tails are transferred to the secondary location first, and the
+dashboards poll every few seconds like dashboard.js does.
+
+Requests go through urllib only, so the server can be any instance this
+machine can reach. With `scan_url` the kitchen and sales stations talk to a
+separate scan pool (WEB_POOL=scan) and the rest to `base_url`; `reports`
+stations keep downloading one large label PDF to load the report workers.
+"""
+import http.cookiejar
+import json
+import queue
+import random
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from dataclasses import dataclass, field
+
+from django.conf import settings
+
+
+def default_credentials() -> dict:
+    """Station role -> (username, PIN) of the operators created by bootstrap_default_operators."""
+    return {
+        "kitchen": ("cocina", settings.DEFAULT_FESTIVAL_KITCHEN_PIN),
+        "sales": ("ventas", settings.DEFAULT_FESTIVAL_SALES_PIN),
+        "secondary_sales": ("ventassec", settings.DEFAULT_FESTIVAL_SECONDARY_SALES_PIN),
+        "batches": ("lotes", settings.DEFAULT_FESTIVAL_BATCHES_PIN),
+        "operator": ("ciprianooperador", settings.DEFAULT_CIPRIANO_OPERADOR_PIN),
+        "admin": ("ciprianoadministrador", settings.DEFAULT_CIPRIANO_ADMINISTRADOR_PIN),
+    }
+
+
+@dataclass
+class LoadConfig:
+    base_url: str
+    duration: float = 60
+    kitchens: int = 2
+    sales: int = 3
+    dashboards: int = 4
+    dashboard_interval: float = 3
+    think: float = 0.5
+    batch_every: float = 30
+    batch_size: int = 24
+    transfer_share: float = 0.25
+    waiters: int = 10
+    day_code: str = "LT"
+    seed: int = 1
+    scan_url: str = ""
+    reports: int = 0
+    report_labels: int = 10000
+    credentials: dict = field(default_factory=default_credentials)
+
+
+class Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies: dict[str, list[float]] = defaultdict(list)
+        self.errors: dict[str, int] = defaultdict(int)
+        self.statuses: dict[str, dict[int, int]] = defaultdict(lambda: defaultdict(int))
+        self.first_error: dict[str, str] = {}
+
+    def record(self, name: str, seconds: float, status: int, error: str = "") -> None:
+        with self._lock:
+            self.latencies[name].append(seconds)
+            self.statuses[name][status] += 1
+            if error:
+                self.errors[name] += 1
+                self.first_error.setdefault(name, error)
+
+    def report(self, elapsed: float) -> list[dict]:
+        rows = []
+        with self._lock:
+            for name in sorted(self.latencies):
+                values = sorted(self.latencies[name])
+                count = len(values)
+                rows.append(
+                    {
+                        "endpoint": name,
+                        "requests": count,
+                        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+                        "p50_ms": round(_percentile(values, 50) * 1000, 1),
+                        "p95_ms": round(_percentile(values, 95) * 1000, 1),
+                        "p99_ms": round(_percentile(values, 99) * 1000, 1),
+                        "max_ms": round(values[-1] * 1000, 1),
+                        "error_rate": round(self.errors[name] / count, 4),
+                        "statuses": dict(sorted(self.statuses[name].items())),
+                        "first_error": self.first_error.get(name, ""),
+                    }
+                )
+        return rows
+
+
+def _percentile(sorted_values: list[float], percentile: int) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percentile // 100))
+    return sorted_values[rank - 1]
+
+
+class Session:
+    """One logged-in browser: cookie jar, CSRF token and timed requests."""
+
+    def __init__(self, base_url: str, stats: Stats):
+        self.base_url = base_url.rstrip("/")
+        self.stats = stats
+        self.cookies = http.cookiejar.CookieJar()
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookies), _NoRedirect())
+
+    def _csrf(self) -> str:
+        return next((cookie.value for cookie in self.cookies if cookie.name == "csrftoken"), "")
+
+    def login(self, username: str, pin: str) -> None:
+        url = f"{self.base_url}/festival/login/"
+        self.opener.open(url, timeout=30).read()
+        form = urllib.parse.urlencode({"username": username, "pin": pin, "csrfmiddlewaretoken": self._csrf()})
+        request = urllib.request.Request(url, data=form.encode(), headers={"Referer": url})
+        try:
+            response = self.opener.open(request, timeout=30)
+            status = response.status
+        except urllib.error.HTTPError as exc:
+            status = exc.code
+        if status != 302:
+            raise RuntimeError(f"No se pudo iniciar sesion como {username} (HTTP {status})")
+
+    def request(self, name: str, path: str, *, payload=None, headers=None):
+        """Return (status, parsed JSON or raw bytes, response headers); never raises for HTTP errors."""
+        headers = dict(headers or {})
+        data = None
+        if payload is not None:
+            data = json.dumps(payload).encode()
+            headers.update({"Content-Type": "application/json", "X-CSRFToken": self._csrf()})
+        request = urllib.request.Request(f"{self.base_url}{path}", data=data, headers=headers)
+        started = time.perf_counter()
+        try:
+            response = self.opener.open(request, timeout=30)
+            status, body, response_headers = response.status, response.read(), response.headers
+        except urllib.error.HTTPError as exc:
+            status, body, response_headers = exc.code, exc.read(), exc.headers
+        except (urllib.error.URLError, OSError) as exc:
+            self.stats.record(name, time.perf_counter() - started, 0, str(exc) or "sin respuesta")
+            return 0, None, {}
+        elapsed = time.perf_counter() - started
+        if response_headers.get("Content-Type", "").startswith("application/json"):
+            body = json.loads(body or b"null")
+        error = ""
+        if status >= 400:
+            error = body.get("error", "") if isinstance(body, dict) else ""
+            error = error or f"HTTP {status}"
+        self.stats.record(name, elapsed, status, error)
+        return status, body, response_headers
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Night:
+    def __init__(self, config: LoadConfig):
+        self.config = config
+        self.stats = Stats()
+        self.stop = threading.Event()
+        self.to_cook: queue.Queue = queue.Queue()
+        self.ready_main: queue.Queue = queue.Queue()
+        self.ready_secondary: queue.Queue = queue.Queue()
+        self.to_transfer: queue.Queue = queue.Queue()
+        self._pending_lock = threading.Lock()
+        self._pending: dict[tuple[str, str], set[str]] = {}
+        self.waiter_codes: list[str] = []
+        self.report_pdf_url = ""
+
+    def _session(self, role: str, *, scan: bool = False) -> Session:
+        username, pin = self.config.credentials[role]
+        session = Session((scan and self.config.scan_url) or self.config.base_url, self.stats)
+        session.login(username, pin)
+        return session
+
+    def _pause(self, seconds: float) -> bool:
+        return not self.stop.wait(seconds)
+
+    def prepare(self) -> None:
+        session = self._session("batches")
+        status, body, _ = session.request("GET /api/waiters", "/api/waiters")
+        codes = [waiter["code"] for waiter in (body or {}).get("waiters", [])] if status == 200 else []
+        for number in range(len(codes), self.config.waiters):
+            status, body, _ = session.request(
+                "POST /api/waiters", "/api/waiters", payload={"name": f"CARGA {number + 1:02d}"}
+            )
+            if status == 200:
+                codes.append(body["waiter"]["code"])
+        if not codes:
+            raise RuntimeError("No hay meseros activos para las ventas")
+        self.waiter_codes = codes
+        if self.config.reports:
+            status, body, _ = session.request(
+                "POST /api/batches/generate (reportes)",
+                "/api/batches/generate",
+                payload={
+                    "day_code": f"{self.config.day_code}R",
+                    "flavor_prefix": "DIA",
+                    "flavor": "DIAVOLA",
+                    "quantity": self.config.report_labels,
+                    "price": "10",
+                    "size": "G",
+                },
+            )
+            if status != 200 or not body.get("ok"):
+                error = body.get("error", "") if isinstance(body, dict) else ""
+                raise RuntimeError(f"No se pudo generar el lote de etiquetas para reportes (HTTP {status}): {error}")
+            self.report_pdf_url = body["labels_pdf_url"]
+
+    def batch_station(self, rng: random.Random) -> None:
+        session = self._session("batches")
+        flavors = [("DIAVOLA", "DIA"), ("DIAVOLA A MI MANERA", "DAM"), ("JAMON Y QUESO", "JYQ")]
+        while not self.stop.is_set():
+            flavor, prefix = rng.choice(flavors)
+            status, body, _ = session.request(
+                "POST /api/batches/generate",
+                "/api/batches/generate",
+                payload={
+                    "day_code": self.config.day_code,
+                    "flavor_prefix": prefix,
+                    "flavor": flavor,
+                    "quantity": self.config.batch_size,
+                    "price": "10",
+                    "size": "G",
+                },
+            )
+            if status == 200 and body.get("ok"):
+                session.request("GET /api/batches/<code>/labels.pdf", body["labels_pdf_url"])
+                self._enqueue_batch(body["first_id"], body["last_id"], rng)
+            if not self._pause(self.config.batch_every):
+                return
+
+    def _enqueue_batch(self, first_id: str, last_id: str, rng: random.Random) -> None:
+        base, start = first_id.rsplit("-", 1)
+        end = int(last_id.rsplit("-", 1)[1])
+        ids = [f"{base}-{number:04d}" for number in range(int(start), end + 1)]
+        tail = int(len(ids) * self.config.transfer_share) if rng.random() < 0.5 else 0
+        if tail:
+            with self._pending_lock:
+                self._pending[(ids[-tail], ids[-1])] = set(ids[-tail:])
+        for pizza_id in ids:
+            self.to_cook.put(pizza_id)
+
+    def _mark_ready(self, pizza_id: str) -> None:
+        with self._pending_lock:
+            for key, waiting in self._pending.items():
+                if pizza_id in waiting:
+                    waiting.discard(pizza_id)
+                    if not waiting:
+                        del self._pending[key]
+                        self.to_transfer.put(key)
+                    return
+        self.ready_main.put(pizza_id)
+
+    def kitchen_station(self, rng: random.Random) -> None:
+        session = self._session("kitchen", scan=True)
+        while not self.stop.is_set():
+            try:
+                pizza_id = self.to_cook.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            status, body, _ = session.request(
+                "POST /api/scan KITCHEN", "/api/scan", payload={"id": pizza_id, "mode": "KITCHEN"}
+            )
+            if status == 200 and body.get("ok"):
+                self._mark_ready(pizza_id)
+            if not self._pause(rng.expovariate(1 / self.config.think)):
+                return
+
+    def sales_station(self, rng: random.Random, role: str, ready: queue.Queue) -> None:
+        session = self._session(role, scan=True)
+        session.request("GET /api/waiters", "/api/waiters")
+        while not self.stop.is_set():
+            try:
+                pizza_id = ready.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            session.request(
+                "POST /api/scan SALES",
+                "/api/scan",
+                payload={"id": pizza_id, "mode": "SALES", "waiter_code": rng.choice(self.waiter_codes)},
+            )
+            if not self._pause(rng.expovariate(1 / self.config.think)):
+                return
+
+    def transfer_station(self) -> None:
+        session = self._session("operator")
+        while not self.stop.is_set():
+            try:
+                start_id, end_id = self.to_transfer.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            status, body, _ = session.request(
+                "POST /api/admin/transfer-to-secondary",
+                "/api/admin/transfer-to-secondary",
+                payload={"start_id": start_id, "end_id": end_id, "note": "prueba de carga"},
+            )
+            if status == 200 and body.get("ok"):
+                base, start = start_id.rsplit("-", 1)
+                for number in range(int(start), int(end_id.rsplit("-", 1)[1]) + 1):
+                    self.ready_secondary.put(f"{base}-{number:04d}")
+
+    def dashboard(self, rng: random.Random) -> None:
+        session = self._session("operator")
+        etag = ""
+        # Dashboards open at different moments, not in lockstep.
+        if not self._pause(rng.uniform(0, self.config.dashboard_interval)):
+            return
+        while not self.stop.is_set():
+            headers = {"If-None-Match": etag} if etag else {}
+            status, _, response_headers = session.request("GET /api/dashboard", "/api/dashboard", headers=headers)
+            if status == 200:
+                etag = response_headers.get("ETag", "")
+            if not self._pause(self.config.dashboard_interval):
+                return
+
+    def report_station(self) -> None:
+        session = self._session("batches")
+        name = f"GET labels.pdf ({self.config.report_labels} etiquetas)"
+        while not self.stop.is_set():
+            status, _, headers = session.request(name, self.report_pdf_url)
+            if status == 429 and not self._pause(float(headers.get("Retry-After", 1))):
+                return
+
+    def run(self) -> dict:
+        config = self.config
+        rng = random.Random(config.seed)
+        self.prepare()
+        stations = [("lotes", self.batch_station, ()), ("traspasos", self.transfer_station, None)]
+        stations += [(f"cocina-{n}", self.kitchen_station, ()) for n in range(config.kitchens)]
+        stations += [(f"ventas-{n}", self.sales_station, ("sales", self.ready_main)) for n in range(config.sales)]
+        stations += [("ventas-secundario", self.sales_station, ("secondary_sales", self.ready_secondary))]
+        stations += [(f"dashboard-{n}", self.dashboard, ()) for n in range(config.dashboards)]
+        stations += [(f"reportes-{n}", self.report_station, None) for n in range(config.reports)]
+
+        threads = []
+        for name, target, extra in stations:
+            args = () if extra is None else (random.Random(rng.random()), *extra)
+            threads.append(threading.Thread(target=target, args=args, name=name, daemon=True))
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        self.stop.wait(config.duration)
+        self.stop.set()
+        for thread in threads:
+            thread.join(timeout=35)
+        elapsed = time.perf_counter() - started
+        return {
+            "base_url": config.base_url,
+            "scan_url": config.scan_url or config.base_url,
+            "seconds": round(elapsed, 1),
+            "stations": {
+                "kitchens": config.kitchens,
+                "sales": config.sales,
+                "dashboards": config.dashboards,
+                "reports": config.reports,
+            },
+            "backlog": {
+                "to_cook": self.to_cook.qsize(),
+                "ready_main": self.ready_main.qsize(),
+                "ready_secondary": self.ready_secondary.qsize(),
+            },
+            "endpoints": self.stats.report(elapsed),
+        }
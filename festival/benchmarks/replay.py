@@ -0,0 +1,317 @@
+"""Export a recorded night's scan log and replay it against a fresh database.
+
+The export turns the ScanEvent log of one business date into ordered steps:
+single kitchen/sales scans, bulk READY and transfer operations (one step per
+BulkOperation, like the original request) and admin status changes. Undone
+events and their UNDO rows are left out, since together they do not change
+the final state.
+
+The replay loads the pizzas in the state they had before their first step,
+then plays the steps at their original relative times divided by `speed`,
+one worker per original actor so the station concurrency is the same. It
+calls the services in-process or the HTTP API of a server that uses the same
+database.
+"""
+import queue
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from festival.benchmarks.load import Session, Stats, _percentile, default_credentials
+from festival.models import (
+    Batch,
+    BulkOperationKind,
+    LocationType,
+    PizzaItem,
+    RoleType,
+    ScanEvent,
+    Waiter,
+)
+from festival.services import (
+    Actor,
+    TransitionError,
+    admin_set_status,
+    bulk_mark_ready,
+    process_scan,
+    transfer_items_between_locations,
+)
+
+REPLAYED_MODES = {"KITCHEN", "SALES", "TRANSFER", "ADMIN"}
+
+
+def export_night(*, branding: str, day) -> dict:
+    events = (
+        ScanEvent.objects.filter(branding=branding, business_date=day, undone=False, mode__in=REPLAYED_MODES)
+        .select_related("bulk_operation")
+        .order_by("created_at", "id")
+    )
+    steps = []
+    seen_operations = set()
+    first_state: dict[str, tuple[str, str]] = {}
+    waiters: dict[str, str] = {}
+    for event in events.iterator():
+        first_state.setdefault(event.pizza_id, (event.from_status, event.from_location or LocationType.MAIN))
+        if event.waiter_code:
+            waiters[event.waiter_code] = event.waiter_name
+        step = {"at": event.created_at.isoformat(), "actor": event.actor_name, "kind": event.mode}
+        operation = event.bulk_operation
+        if operation and operation.kind in {BulkOperationKind.READY, BulkOperationKind.TRANSFER}:
+            if operation.id in seen_operations:
+                continue
+            seen_operations.add(operation.id)
+            step.update(start_id=operation.first_id, end_id=operation.last_id)
+            if operation.kind == BulkOperationKind.READY:
+                step["kind"] = "BULK_READY"
+            else:
+                step.update(from_location=operation.from_location, to_location=operation.to_location)
+        elif event.mode == "TRANSFER":
+            step.update(
+                start_id=event.pizza_id,
+                end_id=event.pizza_id,
+                from_location=event.from_location,
+                to_location=event.to_location,
+            )
+        else:
+            step.update(pizza_id=event.pizza_id, location=event.from_location or LocationType.MAIN)
+            if event.mode == "SALES":
+                step["waiter_code"] = event.waiter_code
+            elif event.mode == "ADMIN":
+                step["to_status"] = event.to_status
+        steps.append(step)
+
+    pizzas = []
+    ids = sorted(first_state)
+    for offset in range(0, len(ids), 500):
+        for item in PizzaItem.objects.filter(pk__in=ids[offset : offset + 500]).select_related("batch").order_by("id"):
+            status, location = first_state[item.id]
+            pizzas.append(
+                {
+                    "id": item.id,
+                    "batch": item.batch.code if item.batch else "",
+                    "flavor": item.flavor,
+                    "size": item.size,
+                    "price": str(item.price),
+                    "status": status,
+                    "location": location,
+                }
+            )
+    return {
+        "branding": branding,
+        "day": day.isoformat(),
+        "pizzas": pizzas,
+        "waiters": [{"code": code, "name": name} for code, name in sorted(waiters.items())],
+        "steps": steps,
+    }
+
+
+def load_night(night: dict) -> None:
+    """Create the night's pizzas, batches and waiters in an empty database."""
+    branding = night["branding"]
+    ids = [pizza["id"] for pizza in night["pizzas"]]
+    if PizzaItem.objects.filter(pk__in=ids[:1000]).exists():
+        raise RuntimeError("La base ya tiene pizzas de esta noche; usar una base nueva (DB_NAME)")
+    day = datetime.fromisoformat(night["day"]).date()
+    batches = {}
+    for code in sorted({pizza["batch"] for pizza in night["pizzas"] if pizza["batch"]}):
+        batches[code], _ = Batch.objects.get_or_create(
+            code=code, defaults={"branding": branding, "day": day, "created_by": "replay"}
+        )
+    PizzaItem.objects.bulk_create(
+        [
+            PizzaItem(
+                id=pizza["id"],
+                branding=branding,
+                flavor=pizza["flavor"],
+                size=pizza["size"],
+                price=pizza["price"],
+                status=pizza["status"],
+                current_location=pizza["location"],
+                batch=batches.get(pizza["batch"]),
+                created_by="replay",
+            )
+            for pizza in night["pizzas"]
+        ],
+        batch_size=2000,
+    )
+    for waiter in night["waiters"]:
+        Waiter.objects.get_or_create(
+            code=waiter["code"], defaults={"name": waiter["name"], "branding": branding, "created_by": "replay"}
+        )
+
+
+def _credential_role(step: dict) -> str:
+    if step["kind"] in {"KITCHEN", "BULK_READY"}:
+        return "kitchen"
+    if step["kind"] == "SALES":
+        return "secondary_sales" if step["location"] == LocationType.SECONDARY else "sales"
+    if step["kind"] == "TRANSFER":
+        return "operator"
+    return "admin"
+
+
+class Replayer:
+    def __init__(self, night: dict, *, speed: float, base_url: str = "", window_seconds: int = 60):
+        self.night = night
+        self.branding = night["branding"]
+        self.speed = speed
+        self.base_url = base_url
+        self.window_seconds = window_seconds
+        self.stats = Stats()
+        self.credentials = default_credentials()
+        self._lock = threading.Lock()
+        self.windows: dict[int, list[tuple[float, float, bool]]] = defaultdict(list)
+
+    def _direct(self, step: dict) -> None:
+        kind = step["kind"]
+        if kind in {"KITCHEN", "SALES"}:
+            location = LocationType.MAIN if kind == "KITCHEN" else step["location"]
+            role = RoleType.COCINA if kind == "KITCHEN" else RoleType.VENTAS
+            actor = Actor(name=step["actor"], role=role, location=location)
+            process_scan(
+                pizza_id=step["pizza_id"],
+                mode=kind,
+                actor=actor,
+                waiter_code=step.get("waiter_code", ""),
+                branding=self.branding,
+            )
+        elif kind == "BULK_READY":
+            actor = Actor(name=step["actor"], role=RoleType.COCINA, location=LocationType.MAIN)
+            bulk_mark_ready(start_id=step["start_id"], end_id=step["end_id"], actor=actor, branding=self.branding)
+        elif kind == "TRANSFER":
+            transfer_items_between_locations(
+                start_id=step["start_id"],
+                end_id=step["end_id"],
+                actor=Actor(name=step["actor"], role=RoleType.ADMIN, location=LocationType.BOTH),
+                branding=self.branding,
+                from_location=step["from_location"],
+                to_location=step["to_location"],
+            )
+        else:
+            admin_set_status(
+                pizza_id=step["pizza_id"],
+                to_status=step["to_status"],
+                actor=Actor(name=step["actor"], role=RoleType.ADMIN, location=LocationType.BOTH),
+                pin=settings.ADMIN_ACTIONS_PIN,
+                branding=self.branding,
+            )
+
+    def _http(self, sessions: dict, step: dict) -> tuple[int, str]:
+        role = _credential_role(step)
+        if role not in sessions:
+            sessions[role] = Session(self.base_url, self.stats)
+            sessions[role].login(*self.credentials[role])
+        session = sessions[role]
+        kind = step["kind"]
+        if kind in {"KITCHEN", "SALES"}:
+            payload = {"id": step["pizza_id"], "mode": kind, "waiter_code": step.get("waiter_code", "")}
+            status, body, _ = session.request(f"POST /api/scan {kind}", "/api/scan", payload=payload)
+        elif kind == "BULK_READY":
+            payload = {"start_id": step["start_id"], "end_id": step["end_id"]}
+            path = "/api/kitchen/bulk-ready"
+            status, body, _ = session.request(f"POST {path}", path, payload=payload)
+        elif kind == "TRANSFER":
+            path = (
+                "/api/admin/transfer-to-secondary"
+                if step["to_location"] == LocationType.SECONDARY
+                else "/api/admin/return-to-main"
+            )
+            payload = {"start_id": step["start_id"], "end_id": step["end_id"], "note": "replay"}
+            status, body, _ = session.request(f"POST {path}", path, payload=payload)
+        else:
+            payload = {"id": step["pizza_id"], "to_status": step["to_status"], "pin": settings.ADMIN_ACTIONS_PIN}
+            status, body, _ = session.request("POST /api/admin/status", "/api/admin/status", payload=payload)
+        return status, (body.get("error", "") if isinstance(body, dict) else "")
+
+    def _worker(self, jobs: queue.Queue) -> None:
+        sessions: dict = {}
+        try:
+            while True:
+                job = jobs.get()
+                if job is None:
+                    return
+                scheduled, offset, step = job
+                started = time.perf_counter()
+                ok = True
+                if self.base_url:
+                    status, _ = self._http(sessions, step)
+                    ok = 0 < status < 400
+                else:
+                    error = ""
+                    try:
+                        self._direct(step)
+                    except TransitionError as exc:
+                        error = str(exc)
+                    except Exception as exc:  # a locked or failing database is a result here, not a crash
+                        error = f"{type(exc).__name__}: {exc}"
+                    ok = not error
+                    self.stats.record(step["kind"], time.perf_counter() - started, 200 if ok else 500, error)
+                finished = time.perf_counter()
+                with self._lock:
+                    self.windows[int(offset // self.window_seconds)].append(
+                        (finished - started, max(0.0, started - scheduled), ok)
+                    )
+        finally:
+            if not self.base_url:
+                connection.close()
+
+    def run(self) -> dict:
+        steps = self.night["steps"]
+        if not steps:
+            raise RuntimeError("La noche exportada no tiene pasos para reproducir")
+        origin = datetime.fromisoformat(steps[0]["at"])
+        queues: dict[str, queue.Queue] = {}
+        threads = []
+        started = time.perf_counter()
+        for step in steps:
+            offset = (datetime.fromisoformat(step["at"]) - origin).total_seconds()
+            scheduled = started + offset / self.speed
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs = queues.get(step["actor"])
+            if jobs is None:
+                jobs = queues[step["actor"]] = queue.Queue()
+                thread = threading.Thread(target=self._worker, args=(jobs,), name=f"replay-{step['actor']}")
+                thread.start()
+                threads.append(thread)
+            jobs.put((scheduled, offset, step))
+        for jobs in queues.values():
+            jobs.put(None)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+        return {
+            "branding": self.branding,
+            "day": self.night["day"],
+            "speed": self.speed,
+            "target": self.base_url or "services",
+            "steps": len(steps),
+            "seconds": round(elapsed, 1),
+            "endpoints": self.stats.report(elapsed),
+            "windows": self._window_report(origin),
+        }
+
+    def _window_report(self, origin: datetime) -> list[dict]:
+        rows = []
+        for index in sorted(self.windows):
+            samples = self.windows[index]
+            latencies = sorted(sample[0] for sample in samples)
+            lags = sorted(sample[1] for sample in samples)
+            start = timezone.localtime(origin + timedelta(seconds=index * self.window_seconds))
+            rows.append(
+                {
+                    "window_start": start.isoformat(),
+                    "steps": len(samples),
+                    "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+                    "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+                    "max_ms": round(latencies[-1] * 1000, 1),
+                    "p95_lag_ms": round(_percentile(lags, 95) * 1000, 1),
+                    "errors": sum(1 for sample in samples if not sample[2]),
+                }
+            )
+        return rows
@@ -0,0 +1,301 @@
+"""Timings for the festival/services.py hot paths on seeded data.
+
+Everything runs inside one transaction per scale that is rolled back at the
+end, so the suite never leaves rows behind in the database it runs against.
+The seeded rows live under their own branding and codes, and every measured
+call is scoped to it, so real rows never show up in the numbers.
+"""
+import random
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from festival.analytics import kitchen_times
+from festival.models import Batch, LocationType, PizzaItem, PizzaStatus, ScanEvent, Waiter
+from festival.services import (
+    Actor,
+    bulk_mark_ready,
+    create_batch,
+    process_scan,
+    transfer_items_between_locations,
+    undo_last,
+)
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+BATCH_SIZE = 1000
+# Positions inside each seeded batch.
+PREP_RANGE = (1, 600)
+LISTA_RANGE = (601, 900)
+# Not a real branding; also the prefix of every benchmark batch, pizza and waiter code.
+BRANDING = "BENCH"
+RANGE_LENGTH = 10
+
+KITCHEN = Actor(name="bench-cocina", role="COCINA", location=LocationType.MAIN)
+SALES = Actor(name="bench-ventas", role="VENTAS", location=LocationType.BOTH)
+ADMIN = Actor(name="bench-admin", role="ADMIN", location=LocationType.BOTH)
+
+
+def _batch_code(index: int) -> str:
+    return f"{BRANDING}{index:04d}"
+
+
+def ensure_unused() -> None:
+    """Refuse to run over leftover benchmark rows, which would skew the timings or collide on codes."""
+    found = [
+        label
+        for label, model, code_field in (
+            ("lotes", Batch, "code"),
+            ("pizzas", PizzaItem, "id"),
+            ("meseros", Waiter, "code"),
+        )
+        if model.objects.filter(Q(branding=BRANDING) | Q(**{f"{code_field}__startswith": BRANDING})).exists()
+    ]
+    if found:
+        raise RuntimeError(
+            f"La base ya tiene {', '.join(found)} con branding o codigo {BRANDING}; usar una base de prueba con DB_NAME"
+        )
+
+
+def seed(total_items: int, rng: random.Random) -> int:
+    """Bulk insert `total_items` pizzas (plus their events) and return the batch count."""
+    batches = max(1, total_items // BATCH_SIZE)
+    now = timezone.now()
+    Batch.objects.bulk_create(
+        [
+            Batch(code=_batch_code(index), branding=BRANDING, day=timezone.localdate(), created_by="bench")
+            for index in range(batches)
+        ],
+        batch_size=1000,
+    )
+    codes = [_batch_code(index) for index in range(batches)]
+    batch_ids = {code: batch.id for code, batch in Batch.objects.in_bulk(codes, field_name="code").items()}
+    flavors = ["MUZZA", "NAPO", "DIAVOLA", "FUGAZZA", "CALABRESA"]
+
+    items: list[PizzaItem] = []
+    events: list[ScanEvent] = []
+
+    def flush():
+        PizzaItem.objects.bulk_create(items, batch_size=5000)
+        ScanEvent.objects.bulk_create(events, batch_size=5000)
+        items.clear()
+        events.clear()
+
+    for index in range(batches):
+        code = _batch_code(index)
+        flavor = flavors[index % len(flavors)]
+        for number in range(1, BATCH_SIZE + 1):
+            ready_at = now - timedelta(minutes=rng.randint(30, 600))
+            if number <= PREP_RANGE[1]:
+                status = PizzaStatus.PREPARACION
+            elif number <= LISTA_RANGE[1]:
+                status = PizzaStatus.LISTA
+            else:
+                status = PizzaStatus.VENDIDA
+            item = PizzaItem(
+                id=f"{code}-{number:04d}",
+                branding=BRANDING,
+                flavor=flavor,
+                size="G",
+                price=Decimal(rng.choice([9, 10, 12])),
+                status=status,
+                batch_id=batch_ids[code],
+                ready_at=ready_at if status != PizzaStatus.PREPARACION else None,
+                sold_at=ready_at + timedelta(minutes=25) if status == PizzaStatus.VENDIDA else None,
+                sold_location=LocationType.MAIN if status == PizzaStatus.VENDIDA else "",
+            )
+            items.append(item)
+            if status != PizzaStatus.PREPARACION:
+                events.append(
+                    ScanEvent(
+                        pizza_id=item.id,
+                        branding=BRANDING,
+                        flavor=flavor,
+                        mode="KITCHEN",
+                        actor_name=KITCHEN.name,
+                        actor_role=KITCHEN.role,
+                        from_status=PizzaStatus.PREPARACION,
+                        to_status=PizzaStatus.LISTA,
+                        business_date=timezone.localdate(item.ready_at),
+                    )
+                )
+            if status == PizzaStatus.VENDIDA:
+                events.append(
+                    ScanEvent(
+                        pizza_id=item.id,
+                        branding=BRANDING,
+                        flavor=flavor,
+                        mode="SALES",
+                        actor_name=SALES.name,
+                        actor_role=SALES.role,
+                        from_status=PizzaStatus.LISTA,
+                        to_status=PizzaStatus.VENDIDA,
+                        business_date=timezone.localdate(item.sold_at),
+                    )
+                )
+        if len(items) >= 20_000:
+            flush()
+    flush()
+    return batches
+
+
+@contextmanager
+def _count_queries():
+    counter = {"queries": 0}
+
+    def wrapper(execute, sql, params, many, context):
+        counter["queries"] += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(wrapper):
+        yield counter
+
+
+def _percentile(sorted_values: list[float], percentile: int) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * percentile // 100))
+    return sorted_values[rank - 1]
+
+
+def _measure(name: str, calls) -> dict:
+    latencies: list[float] = []
+    with _count_queries() as counter:
+        started = time.perf_counter()
+        for call in calls:
+            op_started = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - op_started)
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    ops = len(latencies)
+    return {
+        "name": name,
+        "ops": ops,
+        "ops_per_sec": round(ops / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "queries_per_op": round(counter["queries"] / ops, 2) if ops else 0.0,
+    }
+
+
+class _Pool:
+    """Hands out unused item ids per status, spread over the seeded batches."""
+
+    def __init__(self, batches: int, rng: random.Random):
+        self.rng = rng
+        self.batches = batches
+        self.next = {"prep": [PREP_RANGE[0]] * batches, "lista": [LISTA_RANGE[0]] * batches}
+        self.limit = {"prep": PREP_RANGE[1], "lista": LISTA_RANGE[1]}
+
+    def take(self, kind: str, count: int = 1) -> list[str]:
+        for _ in range(self.batches * 2):
+            index = self.rng.randrange(self.batches)
+            start = self.next[kind][index]
+            if start + count - 1 <= self.limit[kind]:
+                self.next[kind][index] = start + count
+                return [f"{_batch_code(index)}-{number:04d}" for number in range(start, start + count)]
+        raise RuntimeError(f"Sin items {kind} disponibles; usar menos --ops o una escala mayor")
+
+
+def run(scale: str, *, ops: int, seed_value: int) -> dict:
+    rng = random.Random(seed_value)
+    total_items = SCALES[scale]
+    with transaction.atomic():
+        ensure_unused()
+        seed_started = time.perf_counter()
+        batches = seed(total_items, rng)
+        seed_seconds = time.perf_counter() - seed_started
+        waiter = Waiter.objects.create(code=f"{BRANDING}-W1", name="BENCH", branding=BRANDING)
+        pool = _Pool(batches, rng)
+        ranged_ops = max(1, ops // RANGE_LENGTH)
+
+        kitchen_ids = [pool.take("prep")[0] for _ in range(ops)]
+        ready_ranges = [pool.take("prep", RANGE_LENGTH) for _ in range(ranged_ops)]
+        sales_ids = [pool.take("lista")[0] for _ in range(ops)]
+        transfer_ranges = [pool.take("lista", RANGE_LENGTH) for _ in range(ranged_ops)]
+
+        results = [
+            _measure(
+                "process_scan KITCHEN",
+                [
+                    lambda pizza_id=pizza_id: process_scan(
+                        pizza_id=pizza_id, mode="KITCHEN", actor=KITCHEN, branding=BRANDING
+                    )
+                    for pizza_id in kitchen_ids
+                ],
+            ),
+            _measure(
+                f"bulk_mark_ready x{RANGE_LENGTH}",
+                [
+                    lambda ids=ids: bulk_mark_ready(
+                        start_id=ids[0], end_id=ids[-1], actor=KITCHEN, branding=BRANDING
+                    )
+                    for ids in ready_ranges
+                ],
+            ),
+            _measure(
+                "process_scan SALES",
+                [
+                    lambda pizza_id=pizza_id: process_scan(
+                        pizza_id=pizza_id, mode="SALES", actor=SALES, waiter_code=waiter.code, branding=BRANDING
+                    )
+                    for pizza_id in sales_ids
+                ],
+            ),
+            _measure(
+                f"transfer_items_between_locations x{RANGE_LENGTH}",
+                [
+                    lambda ids=ids: transfer_items_between_locations(
+                        start_id=ids[0],
+                        end_id=ids[-1],
+                        actor=ADMIN,
+                        from_location=LocationType.MAIN,
+                        to_location=LocationType.SECONDARY,
+                        branding=BRANDING,
+                    )
+                    for ids in transfer_ranges
+                ],
+            ),
+            _measure(
+                f"create_batch x{RANGE_LENGTH}",
+                [
+                    lambda index=index: create_batch(
+                        day_code=BRANDING,
+                        flavor_prefix=f"N{index:03d}",
+                        flavor="BENCH",
+                        quantity=RANGE_LENGTH,
+                        price=Decimal("10"),
+                        size="G",
+                        actor_name=ADMIN.name,
+                        branding=BRANDING,
+                    )
+                    for index in range(ranged_ops)
+                ],
+            ),
+            _measure(
+                "undo_last",
+                [
+                    lambda: undo_last(pin=settings.ADMIN_ACTIONS_PIN, actor=ADMIN, branding=BRANDING)
+                    for _ in range(ranged_ops)
+                ],
+            ),
+            _measure(
+                "kitchen_times",
+                [lambda: kitchen_times(branding=BRANDING) for _ in range(ranged_ops)],
+            ),
+        ]
+        transaction.set_rollback(True)
+    return {
+        "scale": scale,
+        "items": total_items,
+        "seed": seed_value,
+        "seed_seconds": round(seed_seconds, 2),
+        "results": results,
+    }
+
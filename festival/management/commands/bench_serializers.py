@@ -0,0 +1,160 @@
+import json
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from festival.benchmarks.services import BRANDING, ensure_unused
+from festival.models import LocationType, PizzaItem, PizzaStatus, ScanEvent
+from festival.serializers import PizzaItemSerializer, ScanEventSerializer, pizza_item_data, scan_event_data
+from festival.views import _materialize_dashboard_rows
+
+
+def _sample_objects(count: int) -> list[tuple[PizzaItem, ScanEvent]]:
+    base = timezone.now().replace(microsecond=0) - timedelta(hours=6)
+    statuses = [PizzaStatus.PREPARACION, PizzaStatus.LISTA, PizzaStatus.VENDIDA]
+    pairs = []
+    for index in range(count):
+        created_at = base + timedelta(seconds=index * 7, microseconds=index % 1000)
+        status = statuses[index % len(statuses)]
+        item = PizzaItem(
+            id=f"{BRANDING}-{index:05d}",
+            branding=BRANDING,
+            flavor="BENCH",
+            size="G",
+            price=Decimal(index % 40) + Decimal("0.5"),
+            current_location=LocationType.MAIN if index % 4 else LocationType.SECONDARY,
+            status=status,
+            created_at=created_at,
+            ready_at=created_at + timedelta(minutes=12) if status != PizzaStatus.PREPARACION else None,
+            sold_at=created_at + timedelta(minutes=30) if status == PizzaStatus.VENDIDA else None,
+        )
+        event = ScanEvent(
+            id=index + 1,
+            pizza=item,
+            branding=BRANDING,
+            mode="SALES" if status == PizzaStatus.VENDIDA else "KITCHEN",
+            actor_name="bench",
+            actor_role="VENTAS",
+            from_status=PizzaStatus.LISTA,
+            to_status=status,
+            waiter_code="M-01" if status == PizzaStatus.VENDIDA else "",
+            waiter_name="BENCH" if status == PizzaStatus.VENDIDA else "",
+            created_at=created_at,
+        )
+        pairs.append((item, event))
+    return pairs
+
+
+def _best_seconds(func, rounds: int) -> float:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def _per_thousand(seconds: float, count: int) -> float:
+    return seconds / max(1, count) * 1000 * 1000
+
+
+def _instance_dashboard_row(event: ScanEvent) -> dict:
+    # Previous dashboard serialization, from full model instances.
+    return {
+        "id": event.id,
+        "pizza_id": event.pizza_id,
+        "mode": event.mode,
+        "actor_name": event.actor_name,
+        "actor_role": event.actor_role,
+        "from_location": event.from_location,
+        "to_location": event.to_location,
+        "from_status": event.from_status,
+        "to_status": event.to_status,
+        "waiter_code": event.waiter_code,
+        "waiter_name": event.waiter_name,
+        "note": event.note,
+        "created_at": event.created_at.isoformat() if event.created_at else "",
+        "undone": event.undone,
+        "summary_count": 1,
+    }
+
+
+class Command(BaseCommand):
+    help = "Compara los serializers DRF con los hechos a mano (salida identica y costo por 1.000 objetos)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--count", type=int, default=1000)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument("--json", action="store_true", help="Imprimir el resultado como JSON.")
+
+    def handle(self, *args, **options):
+        pairs = _sample_objects(max(1, options["count"]))
+        items = [item for item, _ in pairs]
+        events = [event for _, event in pairs]
+
+        for item, event in pairs:
+            if PizzaItemSerializer(item).data != pizza_item_data(item):
+                raise CommandError(f"pizza_item_data difiere de PizzaItemSerializer para {item.id}")
+            if ScanEventSerializer(event).data != scan_event_data(event):
+                raise CommandError(f"scan_event_data difiere de ScanEventSerializer para el evento {event.id}")
+
+        rounds = max(1, options["rounds"])
+
+        def compare(before, after, objects):
+            return {
+                "before_ms_per_1000": _per_thousand(_best_seconds(lambda: [before(obj) for obj in objects], rounds), len(objects)),
+                "after_ms_per_1000": _per_thousand(_best_seconds(lambda: [after(obj) for obj in objects], rounds), len(objects)),
+            }
+
+        results = {
+            "objects": len(pairs),
+            "pizza_item": compare(lambda item: PizzaItemSerializer(item).data, pizza_item_data, items),
+            "scan_event": compare(lambda event: ScanEventSerializer(event).data, scan_event_data, events),
+        }
+
+        # The dashboard rows are read back from the sample itself, saved in a rolled-back transaction.
+        with transaction.atomic():
+            try:
+                ensure_unused()
+            except RuntimeError as exc:
+                raise CommandError(str(exc)) from exc
+            PizzaItem.objects.bulk_create(items)
+            for event in events:
+                event.id = None
+            ScanEvent.objects.bulk_create(events)
+            rows = list(
+                ScanEvent.objects.filter(branding=BRANDING)
+                .order_by("-id")
+                .values_list("bulk_operation", "id", "created_at")
+            )
+            ids = [event_id for _, event_id, _ in rows]
+
+            def from_instances():
+                found = ScanEvent.objects.in_bulk(ids)
+                return [_instance_dashboard_row(found[event_id]) for event_id in ids]
+
+            def from_values():
+                return _materialize_dashboard_rows(rows, allow_grouping=False)
+
+            if from_instances() != from_values():
+                raise CommandError("Las filas del dashboard difieren de la serializacion por instancias")
+            results["dashboard_rows"] = {
+                "rows": len(rows),
+                "before_ms_per_1000": _per_thousand(_best_seconds(from_instances, rounds), len(rows)),
+                "after_ms_per_1000": _per_thousand(_best_seconds(from_values, rounds), len(rows)),
+            }
+            transaction.set_rollback(True)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(self.style.SUCCESS(f"Salida identica en {len(pairs)} objetos."))
+        for name, timings in results.items():
+            if not isinstance(timings, dict):
+                continue
+            before, after = timings["before_ms_per_1000"], timings["after_ms_per_1000"]
+            self.stdout.write(f"{name:<16} antes {before:8.2f} ms/1000  despues {after:8.2f} ms/1000  x{before / after:.1f}")
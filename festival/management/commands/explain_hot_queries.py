@@ -0,0 +1,161 @@
+import re
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from festival.models import Batch, BrandingType, PizzaItem, PizzaStatus, SalesRollup, ScanEvent
+from festival.views import (
+    _batch_list,
+    _dashboard_events,
+    _dashboard_rows,
+    _filter_sales,
+    _inventory_items,
+    _local_day_start,
+    _status_counts,
+)
+
+# Postgres reports "Seq Scan on <table>"; SQLite reports "SCAN <table>" unless an index is used.
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(r"Seq Scan on (\w+)"),
+    "sqlite": re.compile(r"\bSCAN (?!SUBQUERY\b|CONSTANT\b)(\w+)\b(?! USING)"),
+}
+
+# A full sort means the index does not give the order: every matching row is read before the first is returned.
+# SQLite's "RIGHT PART OF ORDER BY" and Postgres' Incremental Sort (tie-breaking on id) are fine,
+# the index already orders the rest.
+SORT_PATTERNS = {
+    "postgresql": re.compile(r"^\s*(?:->\s+)?Sort\b(?! Key| Method)", re.MULTILINE),
+    "sqlite": re.compile(r"USE TEMP B-TREE FOR ORDER BY"),
+}
+
+# Index lookups bounded only by branding read every row of the night.
+BRANDING_ONLY_PATTERNS = {
+    "postgresql": re.compile(r"Index Cond: \(\(?branding\)?(?:::text)? = '[^']*'(?:::\w+)?\)$", re.MULTILINE),
+    "sqlite": re.compile(r"SEARCH (\w+) USING (?:COVERING )?INDEX \w+ \(branding=\?\)"),
+}
+
+# ScanEvent carries flavor and business_date, so the dashboard event list must not join the pizzas.
+EVENT_ONLY_QUERIES = {
+    "dashboard latest",
+    "dashboard latest by mode",
+    "dashboard latest by flavor",
+    "dashboard latest by pizza",
+}
+
+# Queries that read the whole branding by design; they are still checked for scans and sorts.
+FULL_BRANDING_READS = {
+    "dashboard status counts",  # counts every pizza of the night
+    "inventory",  # lists every pizza of the night in id order
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Imprime EXPLAIN de las consultas calientes y falla si alguna hace un sequential scan, "
+        "ordena todas las filas, busca en un indice solo por branding "
+        "o si el listado de eventos del dashboard vuelve a unirse con las pizzas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branding", default=BrandingType.FESTIVAL, choices=[BrandingType.FESTIVAL, BrandingType.BURGERS])
+        parser.add_argument("--quiet", action="store_true", help="Solo mostrar las consultas con problemas.")
+
+    def hot_queries(self, branding: str) -> list[tuple[str, object]]:
+        today = timezone.localdate()
+        sample_item = PizzaItem.objects.filter(branding=branding).values_list("id", flat=True).first() or "X"
+        sample_batch = Batch.objects.filter(branding=branding).values_list("code", flat=True).first() or "X"
+        sold = PizzaItem.objects.filter(status=PizzaStatus.VENDIDA, branding=branding)
+        sample_flavor = PizzaItem.objects.filter(branding=branding).values_list("flavor", flat=True).first() or "X"
+        night_start = _local_day_start(today)
+        night_end = _local_day_start(today + timedelta(days=1))
+        return [
+            ("scan", PizzaItem.objects.filter(pk=sample_item, branding=branding)),
+            ("undo", ScanEvent.objects.filter(undone=False, branding=branding).order_by("-created_at")[:1]),
+            ("dashboard status counts", _status_counts(branding)),
+            (
+                "dashboard revenue",
+                _filter_sales(
+                    SalesRollup.objects.filter(branding=branding),
+                    flavor="",
+                    waiter_name="",
+                    location="",
+                    date_from=today,
+                    date_to=today,
+                    time_field="hour",
+                ),
+            ),
+            ("dashboard latest", _dashboard_rows(_dashboard_events(branding))[:50]),
+            (
+                "dashboard latest by mode",
+                _dashboard_rows(_dashboard_events(branding, mode="SALES", to_status=PizzaStatus.VENDIDA))[:50],
+            ),
+            (
+                "dashboard latest by flavor",
+                _dashboard_rows(_dashboard_events(branding, flavor=sample_flavor, date_from=today, date_to=today))[:50],
+            ),
+            (
+                "dashboard latest by pizza",
+                _dashboard_rows(_dashboard_events(branding, pizza_id=sample_item), allow_grouping=False)[:50],
+            ),
+            ("inventory", _inventory_items(branding)),
+            (
+                "sales export",
+                _filter_sales(sold, flavor="", waiter_name="", location="", date_from=today, date_to=today).order_by(
+                    "sold_at", "id"
+                ),
+            ),
+            ("batch list", _batch_list(branding)),
+            ("batch labels", PizzaItem.objects.filter(batch__code=sample_batch, branding=branding).order_by("id")),
+            (
+                "kitchen times prep",
+                PizzaItem.objects.filter(branding=branding, ready_at__gte=night_start, ready_at__lt=night_end).values_list(
+                    "flavor", "created_at", "ready_at"
+                ),
+            ),
+            (
+                "kitchen times dwell",
+                sold.filter(sold_at__gte=night_start, sold_at__lt=night_end).values_list("flavor", "ready_at", "sold_at"),
+            ),
+        ]
+
+    def handle(self, *args, **options):
+        vendor = connection.vendor
+        if vendor not in SEQ_SCAN_PATTERNS:
+            raise CommandError(f"Motor no soportado: {vendor}")
+
+        failures = []
+        pizza_table = PizzaItem._meta.db_table
+        with transaction.atomic():
+            if vendor == "postgresql":
+                # On small seeded tables the planner prefers seq scans; force it to show the index plan.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+            for label, queryset in self.hot_queries(options["branding"]):
+                plan = queryset.explain()
+                problems = []
+                scanned = SEQ_SCAN_PATTERNS[vendor].findall(plan)
+                if scanned:
+                    problems.append(", ".join(sorted(set(scanned))))
+                sorted_all = bool(SORT_PATTERNS[vendor].search(plan))
+                if sorted_all:
+                    problems.append("ordena todas las filas")
+                # A sliced query walking the index in order stops early, so a branding-only bound is fine there.
+                walks_index = queryset.query.high_mark is not None and not sorted_all
+                if label not in FULL_BRANDING_READS and not walks_index and BRANDING_ONLY_PATTERNS[vendor].search(plan):
+                    problems.append("indice solo por branding")
+                if label in EVENT_ONLY_QUERIES and (
+                    pizza_table in queryset.query.sql_with_params()[0] or pizza_table in plan
+                ):
+                    problems.append(f"usa {pizza_table}")
+                if problems:
+                    failures.append(f"{label}: {'; '.join(problems)}")
+                if problems or not options["quiet"]:
+                    self.stdout.write(self.style.MIGRATE_HEADING(label))
+                    self.stdout.write(plan)
+                    self.stdout.write("")
+
+        if failures:
+            raise CommandError("Consultas con problemas: " + " | ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Sin scans, ordenamientos completos ni busquedas solo por branding."))
@@ -0,0 +1,36 @@
+import json
+from datetime import date
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from festival.benchmarks.replay import export_night
+
+
+class Command(BaseCommand):
+    help = "Exporta el log ordenado de escaneos de una noche para reproducirlo con replay_night."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Fecha de negocio (AAAA-MM-DD); por defecto hoy.")
+        parser.add_argument("--branding", default="FESTIVAL")
+        parser.add_argument("--output", default="-", metavar="ARCHIVO", help="Archivo JSON ('-' para stdout).")
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options["date"]) if options["date"] else timezone.localdate()
+        except ValueError as exc:
+            raise CommandError("--date debe tener formato AAAA-MM-DD") from exc
+        night = export_night(branding=options["branding"].strip().upper(), day=day)
+        if not night["steps"]:
+            raise CommandError(f"No hay escaneos para {day.isoformat()}")
+
+        data = json.dumps(night, indent=1)
+        if options["output"] == "-":
+            self.stdout.write(data)
+            return
+        Path(options["output"]).write_text(data + "\n")
+        self.stderr.write(
+            f"{len(night['steps'])} pasos, {len(night['pizzas'])} pizzas y {len(night['waiters'])} meseros "
+            f"exportados a {options['output']}."
+        )
@@ -0,0 +1,79 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from festival.benchmarks.load import LoadConfig, Night
+
+
+class Command(BaseCommand):
+    help = (
+        "Simula una noche contra un servidor levantado (runserver o gunicorn): cocinas, cajas con mesero, "
+        "dashboards, lotes con etiquetas y traspasos. Informa throughput, latencias y errores por endpoint."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="http://127.0.0.1:8000")
+        parser.add_argument(
+            "--scan-url", default="", help="Pool de escaneos (WEB_POOL=scan) para cocinas y cajas; por defecto --url."
+        )
+        parser.add_argument("--duration", type=float, default=60, help="Segundos de carga.")
+        parser.add_argument("--kitchens", type=int, default=2)
+        parser.add_argument("--sales", type=int, default=3)
+        parser.add_argument("--dashboards", type=int, default=4)
+        parser.add_argument("--dashboard-interval", type=float, default=3)
+        parser.add_argument("--think", type=float, default=0.5, help="Pausa media entre escaneos de una estacion.")
+        parser.add_argument("--batch-every", type=float, default=30, help="Segundos entre lotes generados.")
+        parser.add_argument("--batch-size", type=int, default=24)
+        parser.add_argument("--reports", type=int, default=0, help="Estaciones que descargan sin pausa un PDF grande.")
+        parser.add_argument("--report-labels", type=int, default=10000, help="Etiquetas del PDF de --reports.")
+        parser.add_argument("--day-code", default="LT", help="Codigo de dia de los lotes de la prueba.")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", metavar="ARCHIVO", help="Guardar el resultado como JSON ('-' para stdout).")
+
+    def handle(self, *args, **options):
+        config = LoadConfig(
+            base_url=options["url"],
+            duration=options["duration"],
+            kitchens=max(1, options["kitchens"]),
+            sales=max(1, options["sales"]),
+            dashboards=max(0, options["dashboards"]),
+            dashboard_interval=options["dashboard_interval"],
+            think=max(0.01, options["think"]),
+            batch_every=options["batch_every"],
+            batch_size=max(1, options["batch_size"]),
+            day_code=options["day_code"].strip().upper(),
+            seed=options["seed"],
+            scan_url=options["scan_url"],
+            reports=max(0, options["reports"]),
+            report_labels=max(1, options["report_labels"]),
+        )
+        try:
+            report = Night(config).run()
+        except (RuntimeError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["json"] == "-":
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        if options["json"]:
+            Path(options["json"]).write_text(json.dumps(report, indent=2) + "\n")
+
+        target = report["base_url"]
+        if report["scan_url"] != target:
+            target += f" (escaneos en {report['scan_url']})"
+        self.stdout.write(self.style.SUCCESS(f"{report['seconds']} s contra {target}"))
+        self.stdout.write(f"{'endpoint':<40} {'req':>6} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'error':>7}")
+        for row in report["endpoints"]:
+            self.stdout.write(
+                f"{row['endpoint']:<40} {row['requests']:>6} {row['rps']:>7.2f} "
+                f"{row['p50_ms']:>6.1f}ms {row['p95_ms']:>6.1f}ms {row['p99_ms']:>6.1f}ms {row['error_rate']:>7.1%}"
+            )
+        for row in report["endpoints"]:
+            if row["first_error"]:
+                self.stdout.write(f"  {row['endpoint']}: {row['first_error']}")
+        backlog = report["backlog"]
+        self.stdout.write(
+            f"Pendientes al cortar: {backlog['to_cook']} por cocinar, {backlog['ready_main']} listas en principal, "
+            f"{backlog['ready_secondary']} listas en secundario."
+        )
@@ -0,0 +1,67 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from festival.benchmarks.replay import Replayer, load_night
+
+
+class Command(BaseCommand):
+    help = (
+        "Reproduce una noche exportada con export_night sobre una base nueva, respetando los tiempos "
+        "relativos divididos por --speed, y muestra donde se degrada la latencia."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("night", help="Archivo JSON generado por export_night.")
+        parser.add_argument("--speed", type=float, default=1, help="Factor de aceleracion (10 = diez veces mas rapido).")
+        parser.add_argument(
+            "--url",
+            default="",
+            help="Reproducir via HTTP contra este servidor (que debe usar la misma base); sin --url llama a los services.",
+        )
+        parser.add_argument("--window", type=int, default=60, help="Segundos de la noche original por ventana.")
+        parser.add_argument("--worst", type=int, default=5, help="Ventanas mas lentas a listar.")
+        parser.add_argument("--json", metavar="ARCHIVO", help="Guardar el resultado como JSON ('-' para stdout).")
+
+    def handle(self, *args, **options):
+        if options["speed"] <= 0:
+            raise CommandError("--speed debe ser positivo")
+        night = json.loads(Path(options["night"]).read_text())
+        try:
+            load_night(night)
+            report = Replayer(
+                night,
+                speed=options["speed"],
+                base_url=options["url"],
+                window_seconds=max(1, options["window"]),
+            ).run()
+        except (RuntimeError, OSError) as exc:
+            raise CommandError(str(exc)) from exc
+
+        if options["json"] == "-":
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        if options["json"]:
+            Path(options["json"]).write_text(json.dumps(report, indent=2) + "\n")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{report['steps']} pasos de {report['day']} en {report['seconds']} s (x{report['speed']:g}) "
+                f"contra {report['target']}"
+            )
+        )
+        for row in report["endpoints"]:
+            self.stdout.write(
+                f"  {row['endpoint']:<40} {row['requests']:>7} p50 {row['p50_ms']:>7.1f}ms p95 {row['p95_ms']:>7.1f}ms "
+                f"p99 {row['p99_ms']:>7.1f}ms error {row['error_rate']:.1%}"
+            )
+            if row["first_error"]:
+                self.stdout.write(f"    {row['first_error']}")
+        worst = sorted(report["windows"], key=lambda row: row["p95_ms"], reverse=True)[: options["worst"]]
+        self.stdout.write("Ventanas con peor p95:")
+        for row in worst:
+            self.stdout.write(
+                f"  {row['window_start']}  {row['steps']:>6} pasos  p95 {row['p95_ms']:>7.1f}ms  "
+                f"max {row['max_ms']:>7.1f}ms  retraso p95 {row['p95_lag_ms']:>7.1f}ms  errores {row['errors']}"
+            )
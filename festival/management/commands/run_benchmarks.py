@@ -0,0 +1,67 @@
+import json
+import subprocess
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from festival.benchmarks.services import SCALES, run
+
+
+def _git_commit() -> str:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+    return result.stdout.strip()
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide los caminos calientes de festival/services.py sobre datos sembrados "
+        "(ops/seg, consultas por operacion, p50/p99). Todo se revierte al terminar."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", nargs="+", choices=sorted(SCALES), default=["1k"])
+        parser.add_argument("--ops", type=int, default=100, help="Escaneos por operacion (las de rango usan ops/10).")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", metavar="ARCHIVO", help="Guardar el resultado como JSON ('-' para stdout).")
+
+    def handle(self, *args, **options):
+        report = {
+            "commit": _git_commit(),
+            "database": connection.vendor,
+            "created_at": timezone.now().isoformat(),
+            "runs": [],
+        }
+        for scale in sorted(options["scale"], key=SCALES.get):
+            if options["json"] != "-":
+                self.stdout.write(f"Sembrando {SCALES[scale]:,} pizzas ({scale})...")
+            try:
+                report["runs"].append(run(scale, ops=max(1, options["ops"]), seed_value=options["seed"]))
+            except RuntimeError as exc:
+                raise CommandError(str(exc)) from exc
+
+        if options["json"] == "-":
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        if options["json"]:
+            Path(options["json"]).write_text(json.dumps(report, indent=2) + "\n")
+
+        for result in report["runs"]:
+            self.stdout.write(self.style.SUCCESS(f"{result['scale']}: sembrado en {result['seed_seconds']} s"))
+            for row in result["results"]:
+                self.stdout.write(
+                    f"  {row['name']:<42} {row['ops_per_sec']:>9.1f} ops/s  "
+                    f"p50 {row['p50_ms']:>8.2f} ms  p99 {row['p99_ms']:>8.2f} ms  "
+                    f"{row['queries_per_op']:>6.2f} consultas/op"
+                )
@@ -0,0 +1,371 @@
+import random
+import re
+import time
+from contextlib import contextmanager
+from datetime import timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, models, transaction
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+
+from festival.auth_utils import bootstrap_default_flavors
+from festival.models import (
+    Batch,
+    BulkOperation,
+    BulkOperationKind,
+    Flavor,
+    LocationType,
+    PizzaItem,
+    PizzaStatus,
+    ScanEvent,
+    TransferRecord,
+    Waiter,
+)
+from festival.services import _bump_sales_rollup
+
+SEED_ACTOR = "seed_festival"
+CHUNK_BATCHES = 200
+MERMA_RATE = 0.03
+UNDO_RATE = 0.01
+TRANSFER_RATE = 0.25
+
+ITEM_COLUMNS = [field.attname for field in PizzaItem._meta.concrete_fields]
+EVENT_COLUMNS = [field.attname for field in ScanEvent._meta.concrete_fields if not field.primary_key]
+
+
+@contextmanager
+def _explicit_timestamps(*models):
+    # bulk_create would stamp every row with "now"; the night needs its own clock.
+    fields = [model._meta.get_field("created_at") for model in models]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def _adapter(field):
+    if isinstance(field, models.DateTimeField):
+        return connection.ops.adapt_datetimefield_value
+    if isinstance(field, models.DateField):
+        return connection.ops.adapt_datefield_value
+    if isinstance(field, models.DecimalField):
+        return lambda value: connection.ops.adapt_decimalfield_value(value, field.max_digits, field.decimal_places)
+    return None
+
+
+def _insert_rows(model, columns: list[str], rows: list[dict]) -> None:
+    """Multi-row INSERTs straight from dicts, skipping the per-value ORM compile of bulk_create."""
+    if not rows:
+        return
+    fields = [model._meta.get_field(column) for column in columns]
+    adapters = [(index, adapter) for index, adapter in enumerate(map(_adapter, fields)) if adapter]
+    per_statement = min(1000, max(1, connection.ops.bulk_batch_size(fields, rows)))
+    quote = connection.ops.quote_name
+    head = f"INSERT INTO {quote(model._meta.db_table)} ({', '.join(quote(field.column) for field in fields)}) VALUES "
+    placeholder = f"({', '.join(['%s'] * len(fields))})"
+    with connection.cursor() as cursor:
+        for offset in range(0, len(rows), per_statement):
+            chunk = rows[offset : offset + per_statement]
+            params = []
+            for row in chunk:
+                values = [row[column] for column in columns]
+                for index, adapter in adapters:
+                    if values[index] is not None:
+                        values[index] = adapter(values[index])
+                params.extend(values)
+            cursor.execute(head + ", ".join([placeholder] * len(chunk)), params)
+
+
+def _apply_sales_rollup(items, sign: int) -> int:
+    """Add (or with sign=-1 remove) the sold items of `items` to SalesRollup, one bucket at a time."""
+    buckets = (
+        items.filter(status=PizzaStatus.VENDIDA, sold_at__isnull=False)
+        .annotate(hour=TruncHour("sold_at", tzinfo=dt_timezone.utc))
+        .values("branding", "hour", "flavor", "sold_location", "sold_by")
+        .annotate(sold_count=Count("id"), revenue=Sum("price"))
+        .order_by()
+    )
+    sold = 0
+    for bucket in buckets:
+        key = (bucket["branding"], bucket["hour"], bucket["flavor"], bucket["sold_location"], bucket["sold_by"])
+        _bump_sales_rollup(key, sign * bucket["sold_count"], sign * bucket["revenue"])
+        sold += bucket["sold_count"]
+    return sold
+
+
+class Night:
+    """Builds one synthetic service: batches, pizzas and their scan history."""
+
+    def __init__(self, *, rng, branding, prefix, start, end, flavors, waiters):
+        self.rng = rng
+        self.branding = branding
+        self.prefix = prefix
+        self.start = start
+        self.end = end
+        self.flavors = flavors
+        self.waiters = waiters
+        self.tz = timezone.get_current_timezone()
+        self.batches: list[Batch] = []
+        self.operations: list[BulkOperation] = []
+        self.transfers: list[TransferRecord] = []
+        self.items: list[dict] = []
+        self.events: list[dict] = []
+
+    def _event(self, item, at, *, mode, actor, role, from_status, to_status, location, **extra):
+        self.events.append(
+            {
+                "pizza_id": item["id"],
+                "bulk_operation_id": extra.get("bulk_operation"),
+                "branding": self.branding,
+                "mode": mode,
+                "actor_name": actor,
+                "actor_role": role,
+                "from_location": extra.get("from_location", location),
+                "to_location": location,
+                "from_status": from_status,
+                "to_status": to_status,
+                "flavor": item["flavor"],
+                "waiter_code": extra.get("waiter_code", ""),
+                "waiter_name": extra.get("waiter_name", ""),
+                "note": extra.get("note", ""),
+                "undone": extra.get("undone", False),
+                "business_date": at.astimezone(self.tz).date(),
+                "created_at": at,
+            }
+        )
+
+    def add_batch(self, wave: int, quantity: int) -> None:
+        rng = self.rng
+        name, flavor_prefix, price = self.flavors[wave % len(self.flavors)]
+        code = f"{self.prefix}{wave:05d}-{flavor_prefix}"
+        batch_at = self.start + (self.end - self.start) * rng.random()
+        batch = Batch(
+            code=code,
+            branding=self.branding,
+            day=batch_at.astimezone(self.tz).date(),
+            created_by=SEED_ACTOR,
+            created_at=batch_at,
+        )
+        self.batches.append(batch)
+
+        transfer_at = batch_at + timedelta(minutes=26)
+        transfer_from = quantity + 1
+        operation = None
+        if transfer_at <= self.end and rng.random() < TRANSFER_RATE:
+            transfer_from = rng.randint(1, quantity)
+            shared = {
+                "branding": self.branding,
+                "from_location": LocationType.MAIN,
+                "to_location": LocationType.SECONDARY,
+                "first_id": f"{code}-{transfer_from:04d}",
+                "last_id": f"{code}-{quantity:04d}",
+                "quantity": quantity - transfer_from + 1,
+                "created_by": SEED_ACTOR,
+                "created_at": transfer_at,
+            }
+            operation = BulkOperation(kind=BulkOperationKind.TRANSFER, **shared)
+            self.operations.append(operation)
+            self.transfers.append(TransferRecord(**shared))
+
+        for number in range(1, quantity + 1):
+            item = {
+                "id": f"{code}-{number:04d}",
+                "branding": self.branding,
+                "flavor": name,
+                "size": "G",
+                "price": price,
+                "current_location": LocationType.MAIN,
+                "sold_location": "",
+                "status": PizzaStatus.PREPARACION,
+                "batch_id": batch,
+                "created_at": batch_at,
+                "ready_at": None,
+                "sold_at": None,
+                "canceled_at": None,
+                "created_by": SEED_ACTOR,
+                "ready_by": "",
+                "sold_by": "",
+                "canceled_by": "",
+            }
+            self.items.append(item)
+            self._advance(item, batch_at, transfer_at if number >= transfer_from else None, operation)
+
+    def _advance(self, item, batch_at, transfer_at, operation) -> None:
+        rng = self.rng
+        ready_at = batch_at + timedelta(minutes=rng.uniform(8, 25))
+        if ready_at > self.end:
+            return
+        item.update(status=PizzaStatus.LISTA, ready_at=ready_at, ready_by="cocina")
+        self._event(
+            item, ready_at, mode="KITCHEN", actor="cocina", role="COCINA",
+            from_status=PizzaStatus.PREPARACION, to_status=PizzaStatus.LISTA, location=LocationType.MAIN,
+        )
+
+        available_at = ready_at
+        if transfer_at is not None:
+            item["current_location"] = LocationType.SECONDARY
+            available_at = transfer_at
+            self._event(
+                item, transfer_at, mode="TRANSFER", actor="admin", role="ADMIN",
+                from_status=PizzaStatus.LISTA, to_status=PizzaStatus.LISTA,
+                from_location=LocationType.MAIN, location=LocationType.SECONDARY, bulk_operation=operation,
+            )
+        location = item["current_location"]
+
+        if rng.random() < MERMA_RATE:
+            merma_at = available_at + timedelta(minutes=rng.uniform(5, 90))
+            if merma_at <= self.end:
+                item.update(status=PizzaStatus.MERMA, canceled_at=merma_at, canceled_by="admin")
+                self._event(
+                    item, merma_at, mode="ADMIN", actor="admin", role="ADMIN",
+                    from_status=PizzaStatus.LISTA, to_status=PizzaStatus.MERMA, location=location,
+                )
+            return
+
+        sold_at = available_at + timedelta(minutes=rng.uniform(2, 60))
+        if sold_at > self.end:
+            return
+        waiter = rng.choice(self.waiters)
+        sale = {
+            "mode": "SALES",
+            "actor": "ventas" if location == LocationType.MAIN else "ventas2",
+            "role": "VENTAS",
+            "location": location,
+            "from_status": PizzaStatus.LISTA,
+            "to_status": PizzaStatus.VENDIDA,
+            "waiter_code": waiter.code,
+            "waiter_name": waiter.name,
+        }
+        if rng.random() < UNDO_RATE:
+            self._event(item, sold_at, undone=True, **sale)
+            self._event(
+                item, sold_at + timedelta(minutes=1), mode="UNDO", actor="admin", role="ADMIN",
+                from_status=PizzaStatus.VENDIDA, to_status=PizzaStatus.LISTA, location=location,
+                note="Deshace venta",
+            )
+            sold_at += timedelta(minutes=3)
+            if sold_at > self.end:
+                return
+        self._event(item, sold_at, **sale)
+        item.update(status=PizzaStatus.VENDIDA, sold_at=sold_at, sold_by=waiter.name, sold_location=location)
+
+    def flush(self) -> int:
+        Batch.objects.bulk_create(self.batches)
+        BulkOperation.objects.bulk_create(self.operations)
+        TransferRecord.objects.bulk_create(self.transfers)
+        for item in self.items:
+            item["batch_id"] = item["batch_id"].id
+        for event in self.events:
+            if event["bulk_operation_id"] is not None:
+                event["bulk_operation_id"] = event["bulk_operation_id"].id
+        _insert_rows(PizzaItem, ITEM_COLUMNS, self.items)
+        _insert_rows(ScanEvent, EVENT_COLUMNS, self.events)
+        written = len(self.events)
+        for rows in (self.batches, self.operations, self.transfers, self.items, self.events):
+            rows.clear()
+        return written
+
+
+def _seeded_batches(prefix: str, branding: str):
+    return Batch.objects.filter(branding=branding, created_by=SEED_ACTOR, code__regex=rf"^{prefix}[0-9]{{5}}-")
+
+
+def _delete_seeded(prefix: str, branding: str) -> int:
+    batches = _seeded_batches(prefix, branding)
+    items = PizzaItem.objects.filter(batch__in=batches)
+    _apply_sales_rollup(items, -1)
+    deleted, _ = items.delete()
+    operations = {"branding": branding, "created_by": SEED_ACTOR, "first_id__startswith": prefix}
+    BulkOperation.objects.filter(**operations).delete()
+    TransferRecord.objects.filter(**operations).delete()
+    batches.delete()
+    Waiter.objects.filter(branding=branding, created_by=SEED_ACTOR, code__startswith=f"{prefix}-").delete()
+    return deleted
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera una noche de festival sintetica (lotes, pizzas, escaneos, traspasos, mermas y deshacer) "
+        "con inserts masivos, para perfilar dashboard, inventario y export con tablas de tamano real."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--pizzas", type=int, default=20000)
+        parser.add_argument("--hours", type=float, default=6, help="Duracion de la noche, terminando ahora.")
+        parser.add_argument("--waiters", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--branding", default="FESTIVAL")
+        parser.add_argument("--prefix", default="SF", help="Prefijo de los lotes generados (letras, hasta 6).")
+        parser.add_argument("--flush", action="store_true", help="Borrar antes lo generado con el mismo prefijo.")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"].strip().upper()
+        branding = options["branding"].strip().upper()
+        if not re.fullmatch(r"[A-Z]{1,6}", prefix):
+            raise CommandError("El prefijo debe tener entre 1 y 6 letras")
+        if options["pizzas"] < 1 or options["hours"] <= 0:
+            raise CommandError("--pizzas y --hours deben ser positivos")
+
+        active = Flavor.objects.filter(branding=branding, is_active=True)
+        if not active.exists():
+            # A fresh database has no flavors until the first login bootstraps them.
+            bootstrap_default_flavors()
+            self.stdout.write(f"Sin sabores activos para {branding}: creados los sabores por defecto.")
+        flavors = list(active.values_list("name", "prefix"))
+        if not flavors:
+            raise CommandError(f"No hay sabores activos para {branding}")
+        rng = random.Random(options["seed"])
+        flavors = [(name, flavor_prefix, Decimal(rng.choice([9, 10, 11, 12]))) for name, flavor_prefix in flavors]
+
+        started = time.perf_counter()
+        with transaction.atomic(), _explicit_timestamps(Batch, BulkOperation, TransferRecord):
+            if options["flush"]:
+                removed = _delete_seeded(prefix, branding)
+                self.stdout.write(f"Borradas {removed} filas de una siembra anterior con prefijo {prefix}.")
+            elif Batch.objects.filter(code__regex=rf"^{prefix}[0-9]{{5}}-").exists():
+                raise CommandError(f"Ya hay lotes con prefijo {prefix}; usar --flush u otro --prefix")
+
+            waiters = Waiter.objects.bulk_create(
+                [
+                    Waiter(
+                        code=f"{prefix}-{number:02d}",
+                        name=f"MESERO {number:02d}",
+                        branding=branding,
+                        created_by=SEED_ACTOR,
+                    )
+                    for number in range(1, max(1, options["waiters"]) + 1)
+                ]
+            )
+            end = timezone.now()
+            night = Night(
+                rng=rng,
+                branding=branding,
+                prefix=prefix,
+                start=end - timedelta(hours=options["hours"]),
+                end=end,
+                flavors=flavors,
+                waiters=waiters,
+            )
+            remaining, wave, events = options["pizzas"], 0, 0
+            while remaining:
+                quantity = min(remaining, rng.randint(20, 80))
+                night.add_batch(wave, quantity)
+                remaining -= quantity
+                wave += 1
+                if wave % CHUNK_BATCHES == 0:
+                    events += night.flush()
+            events += night.flush()
+            sold = _apply_sales_rollup(PizzaItem.objects.filter(batch__in=_seeded_batches(prefix, branding)), 1)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['pizzas']} pizzas en {wave} lotes, {events} eventos y {sold} ventas "
+                f"en {time.perf_counter() - started:.1f} s."
+            )
+        )
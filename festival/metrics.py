@@ -0,0 +1,235 @@
+"""Prometheus text exposition without external dependencies.
+
+Every process adds its samples into its own mmap'd file under METRICS_DIR,
+so an increment is a lock plus an 8-byte write. A scrape, served by any
+gunicorn worker, sums the files of all processes. Only counters and
+histograms exist here, so summing is always right, including for files left
+by restarted workers; entrypoint.sh clears the directory on each deploy.
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+
+_HEADER = 8
+_INITIAL_SIZE = 64 * 1024
+_lock = threading.Lock()
+_registry: dict[str, "_Metric"] = {}
+
+
+def _entries(buffer, used: int):
+    """Yield (key, value, value_offset) from a samples file."""
+    position = _HEADER
+    while position < used:
+        (length,) = struct.unpack_from("<i", buffer, position)
+        key_start = position + 4
+        value_offset = key_start + length + (-(4 + length) % 8)
+        key = bytes(buffer[key_start : key_start + length]).decode()
+        yield key, struct.unpack_from("<d", buffer, value_offset)[0], value_offset
+        position = value_offset + 8
+
+
+class _SamplesFile:
+    def __init__(self, path: Path):
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < _INITIAL_SIZE:
+            self._file.truncate(_INITIAL_SIZE)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._used = struct.unpack_from("<i", self._map, 0)[0] or _HEADER
+        self._offsets = {key: offset for key, _, offset in _entries(self._map, self._used)}
+
+    def add(self, key: str, amount: float) -> None:
+        offset = self._offsets.get(key)
+        if offset is None:
+            offset = self._append(key)
+        (value,) = struct.unpack_from("<d", self._map, offset)
+        struct.pack_into("<d", self._map, offset, value + amount)
+
+    def _append(self, key: str) -> int:
+        encoded = key.encode()
+        entry = struct.pack(f"<i{len(encoded) + (-(4 + len(encoded)) % 8)}sd", len(encoded), encoded, 0.0)
+        while self._used + len(entry) > len(self._map):
+            size = len(self._map) * 2
+            self._map.close()
+            self._file.truncate(size)
+            self._map = mmap.mmap(self._file.fileno(), size)
+        self._map[self._used : self._used + len(entry)] = entry
+        self._used += len(entry)
+        # Publish the entry only once it is fully written.
+        struct.pack_into("<i", self._map, 0, self._used)
+        self._offsets[key] = self._used - 8
+        return self._offsets[key]
+
+
+class _ProcessFile:
+    def __init__(self):
+        self._pid = None
+        self._file = None
+
+    def add(self, key: str, amount: float) -> None:
+        with _lock:
+            if self._pid != os.getpid():
+                directory = Path(settings.METRICS_DIR)
+                directory.mkdir(parents=True, exist_ok=True)
+                self._pid = os.getpid()
+                self._file = _SamplesFile(directory / f"{self._pid}.db")
+            self._file.add(key, amount)
+
+
+_samples = _ProcessFile()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        _registry[name] = self
+
+    def _labels(self, labels: dict) -> list:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} espera las etiquetas {self.labelnames}")
+        return [[name, str(labels[name])] for name in self.labelnames]
+
+    def _add(self, sample: str, labels: list, amount: float) -> None:
+        _samples.add(json.dumps([self.name, sample, labels]), amount)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        self._add(self.name, self._labels(labels), amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = (), *, buckets: tuple[float, ...]):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        label_list = self._labels(labels)
+        # Stored per bucket (one write); made cumulative when rendered.
+        bound = next((bucket for bucket in self.buckets if value <= bucket), "+Inf")
+        self._add(f"{self.name}_bucket", label_list + [["le", str(bound)]], 1)
+        self._add(f"{self.name}_sum", label_list, value)
+        self._add(f"{self.name}_count", label_list, 1)
+
+    def timed(self, **labels):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(time.perf_counter() - started, **labels)
+
+            return wrapper
+
+        return decorator
+
+
+SCANS = Counter(
+    "festival_scans_total",
+    "Escaneos procesados por modo, branding y resultado (ok o TransitionError).",
+    ("mode", "branding", "result"),
+)
+SCAN_SECONDS = Histogram(
+    "festival_scan_duration_seconds",
+    "Duracion de process_scan.",
+    ("mode",),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+PDF_SECONDS = Histogram(
+    "festival_pdf_render_seconds",
+    "Duracion del render de etiquetas PDF.",
+    ("kind",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+EXPORT_BYTES = Histogram(
+    "festival_export_bytes",
+    "Tamano de los exports generados.",
+    ("kind",),
+    buckets=(10_000, 100_000, 1_000_000, 10_000_000, 50_000_000),
+)
+HEAVY_REJECTED = Counter(
+    "festival_heavy_jobs_rejected_total",
+    "Descargas pesadas rechazadas con 429 por falta de cupo.",
+    ("kind",),
+)
+DASHBOARD_POLLS = Counter(
+    "festival_dashboard_polls_total",
+    "Polls de /api/dashboard por branding y respuesta (200 o 304).",
+    ("branding", "status"),
+)
+
+
+def _read_all() -> dict[str, float]:
+    totals: dict[str, float] = {}
+    directory = Path(settings.METRICS_DIR)
+    if not directory.is_dir():
+        return totals
+    for path in directory.glob("*.db"):
+        data = path.read_bytes()
+        if len(data) < _HEADER:
+            continue
+        used = min(struct.unpack_from("<i", data, 0)[0], len(data))
+        for key, value, _ in _entries(data, used):
+            totals[key] = totals.get(key, 0.0) + value
+    return totals
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: list) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def render() -> str:
+    samples: dict[str, list[tuple[str, list, float]]] = {}
+    for key, value in _read_all().items():
+        name, sample, labels = json.loads(key)
+        samples.setdefault(name, []).append((sample, labels, value))
+
+    lines = []
+    for name in sorted(_registry):
+        metric = _registry[name]
+        lines.append(f"# HELP {name} {metric.documentation}")
+        lines.append(f"# TYPE {name} {metric.kind}")
+        rows = samples.get(name, [])
+        if metric.kind == "counter":
+            for _, labels, value in sorted(rows):
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+            continue
+        series: dict[tuple, dict] = {}
+        for sample, labels, value in rows:
+            base = tuple(tuple(label) for label in labels if label[0] != "le")
+            entry = series.setdefault(base, {"buckets": {}, "sum": 0.0, "count": 0.0})
+            if sample.endswith("_bucket"):
+                entry["buckets"][labels[-1][1]] = value
+            else:
+                entry[sample.rsplit("_", 1)[1]] = value
+        for base, entry in sorted(series.items()):
+            labels = [list(label) for label in base]
+            cumulative = 0.0
+            for bound in [*map(str, metric.buckets), "+Inf"]:
+                cumulative += entry["buckets"].get(bound, 0.0)
+                lines.append(f"{name}_bucket{_format_labels(labels + [['le', bound]])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {entry['sum']}")
+            lines.append(f"{name}_count{_format_labels(labels)} {entry['count']}")
+    return "\n".join(lines) + "\n"
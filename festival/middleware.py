@@ -0,0 +1,117 @@
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import connection
+
+from . import profiling, slowlog
+from .auth_utils import get_current_operator
+
+
+class PerfRing:
+    """Last N requests per process: route, status, query count, DB time and wall time."""
+
+    def __init__(self, size: int):
+        self._lock = threading.Lock()
+        self._entries: deque = deque(maxlen=size)
+
+    def add(self, entry: tuple) -> None:
+        with self._lock:
+            self._entries.append(entry)
+
+    def entries(self) -> list[tuple]:
+        with self._lock:
+            return list(self._entries)
+
+    def summary(self) -> list[dict]:
+        routes: dict[str, list[tuple]] = {}
+        for entry in self.entries():
+            routes.setdefault(f"{entry[1]} {entry[2]}", []).append(entry)
+        rows = []
+        for route, entries in routes.items():
+            totals = sorted(entry[6] for entry in entries)
+            queries = [entry[4] for entry in entries]
+            rows.append(
+                {
+                    "route": route,
+                    "requests": len(entries),
+                    "errors": sum(1 for entry in entries if entry[3] >= 500),
+                    "avg_queries": round(sum(queries) / len(queries), 1),
+                    "max_queries": max(queries),
+                    "avg_db_ms": round(sum(entry[5] for entry in entries) / len(entries), 2),
+                    "p50_ms": round(totals[(len(totals) - 1) // 2], 2),
+                    "p95_ms": round(totals[max(0, -(-len(totals) * 95 // 100) - 1)], 2),
+                    "max_ms": round(totals[-1], 2),
+                }
+            )
+        return sorted(rows, key=lambda row: row["avg_db_ms"] * row["requests"], reverse=True)
+
+
+perf_ring = PerfRing(settings.PERF_RING_SIZE)
+
+
+class RequestPerfMiddleware:
+    """Counts queries and DB time per request and reports them as Server-Timing.
+
+    Only a counter and a clock are kept per query; SQL text is kept just for
+    statements over SLOW_QUERY_MS, so it stays cheap enough to leave on in
+    production. Slow requests and statements go to festival.slowlog.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = [0, 0.0]
+        slow_query_seconds = settings.SLOW_QUERY_MS / 1000
+        slow_queries = []
+
+        def timed(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                elapsed = time.perf_counter() - started
+                stats[0] += 1
+                stats[1] += elapsed
+                if slow_query_seconds and elapsed >= slow_query_seconds:
+                    slow_queries.append((elapsed, sql, params, many))
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(timed):
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = stats[1] * 1000
+        response["Server-Timing"] = f'db;dur={db_ms:.1f};desc="{stats[0]} consultas", total;dur={total_ms:.1f}'
+
+        match = getattr(request, "resolver_match", None)
+        route = f"/{match.route or match.url_name}" if match is not None else request.path
+        if match is not None:
+            perf_ring.add((time.time(), request.method, route, response.status_code, stats[0], db_ms, total_ms))
+        if slow_queries or (settings.SLOW_REQUEST_MS and total_ms >= settings.SLOW_REQUEST_MS):
+            slowlog.log_request(
+                request,
+                response,
+                route=route,
+                queries=stats[0],
+                db_ms=db_ms,
+                total_ms=total_ms,
+                slow_queries=slow_queries,
+            )
+        return response
+
+
+class ProfileMiddleware:
+    """Runs the request under cProfile when an ADMIN asks for it (see festival.profiling)."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = profiling.requested_mode(request)
+        if mode and request.session.get("operator_role") == "ADMIN":
+            operator = get_current_operator(request)
+            if operator and operator.role == "ADMIN":
+                return profiling.capture(request, self.get_response, mode, operator.username)
+        return self.get_response(request)
@@ -0,0 +1,32 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:23
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0007_alter_operator_role_alter_scanevent_actor_role'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanReceipt',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(blank=True, max_length=64)),
+                ('pizza_code', models.CharField(max_length=32)),
+                ('mode', models.CharField(max_length=20)),
+                ('response', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('operator', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='scan_receipts', to='festival.operator')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['operator', 'pizza_code', 'mode', 'created_at'], name='scanreceipt_recent_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('idempotency_key', ''), _negated=True), fields=('operator', 'idempotency_key'), name='uniq_scanreceipt_operator_key')],
+            },
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_bulk_operations(apps, schema_editor):
+    """Turn legacy bulk-ready|... and transfer-range|... notes into BulkOperation rows."""
+    ScanEvent = apps.get_model("festival", "ScanEvent")
+    BulkOperation = apps.get_model("festival", "BulkOperation")
+
+    open_groups = {}
+    legacy = ScanEvent.objects.filter(
+        models.Q(note__startswith="bulk-ready|") | models.Q(note__startswith="transfer-range|")
+    ).order_by("id")
+    for event in legacy.iterator():
+        parts = event.note.split("|")
+        if parts[0] == "bulk-ready" and len(parts) >= 4:
+            kind, from_location, to_location = "READY", "", ""
+            first_id, last_id, raw_count = parts[1], parts[2], parts[3]
+            user_note = ""
+        elif parts[0] == "transfer-range" and len(parts) >= 6:
+            kind, from_location, to_location = "TRANSFER", parts[1], parts[2]
+            first_id, last_id, raw_count = parts[3], parts[4], parts[5]
+            user_note = "|".join(parts[6:])
+        else:
+            continue
+        quantity = int(raw_count) if raw_count.isdigit() else 1
+
+        key = (event.branding, event.note)
+        group = open_groups.get(key)
+        if group is None or group["remaining"] <= 0:
+            operation = BulkOperation.objects.create(
+                branding=event.branding,
+                kind=kind,
+                from_location=from_location,
+                to_location=to_location,
+                first_id=first_id or event.pizza_id,
+                last_id=last_id or event.pizza_id,
+                quantity=max(1, quantity),
+                created_by=event.actor_name,
+                note=user_note[:200],
+            )
+            BulkOperation.objects.filter(pk=operation.pk).update(created_at=event.created_at)
+            group = {"operation_id": operation.pk, "remaining": max(1, quantity)}
+            open_groups[key] = group
+        group["remaining"] -= 1
+        ScanEvent.objects.filter(pk=event.pk).update(bulk_operation_id=group["operation_id"], note=user_note[:200])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0008_scanreceipt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BulkOperation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branding', models.CharField(choices=[('FESTIVAL', 'Festival'), ('BURGERS', 'Burgers')], db_index=True, default='FESTIVAL', max_length=10)),
+                ('kind', models.CharField(choices=[('READY', 'Marcado LISTA'), ('TRANSFER', 'Transferencia')], max_length=12)),
+                ('from_location', models.CharField(blank=True, choices=[('MAIN', 'Principal'), ('SECONDARY', 'Secundario')], default='', max_length=12)),
+                ('to_location', models.CharField(blank=True, choices=[('MAIN', 'Principal'), ('SECONDARY', 'Secundario')], default='', max_length=12)),
+                ('first_id', models.CharField(max_length=32)),
+                ('last_id', models.CharField(max_length=32)),
+                ('quantity', models.PositiveIntegerField()),
+                ('created_by', models.CharField(blank=True, max_length=80)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='scanevent',
+            name='bulk_operation',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='events', to='festival.bulkoperation'),
+        ),
+        migrations.RunPython(backfill_bulk_operations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:28
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+from django.db.models.functions import TruncDate
+
+
+def backfill_flavor_and_business_date(apps, schema_editor):
+    """Copy the pizza flavor and the local date of each event onto existing rows."""
+    ScanEvent = apps.get_model("festival", "ScanEvent")
+    PizzaItem = apps.get_model("festival", "PizzaItem")
+
+    ScanEvent.objects.update(
+        flavor=Subquery(PizzaItem.objects.filter(pk=OuterRef("pizza_id")).values("flavor")[:1]),
+        business_date=TruncDate("created_at"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0009_bulkoperation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanevent',
+            name='business_date',
+            field=models.DateField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='scanevent',
+            name='flavor',
+            field=models.CharField(blank=True, max_length=40),
+        ),
+        migrations.RunPython(backfill_flavor_and_business_date, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='scanevent',
+            index=models.Index(fields=['branding', 'mode', 'to_status', 'created_at'], name='scanevent_brand_mode_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanevent',
+            index=models.Index(fields=['branding', 'flavor', 'created_at'], name='scanevent_brand_flavor_idx'),
+        ),
+    ]
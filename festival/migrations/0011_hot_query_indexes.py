@@ -0,0 +1,33 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0010_scanevent_flavor_business_date'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='batch',
+            index=models.Index(fields=['branding', '-created_at'], name='batch_brand_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pizzaitem',
+            index=models.Index(fields=['branding', 'status', 'sold_at'], name='pizza_brand_status_sold_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pizzaitem',
+            index=models.Index(fields=['branding', 'created_at'], name='pizza_brand_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pizzaitem',
+            index=models.Index(fields=['batch', 'id'], name='pizza_batch_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanevent',
+            index=models.Index(condition=models.Q(('undone', False)), fields=['branding', '-created_at'], name='scanevent_undo_idx'),
+        ),
+    ]
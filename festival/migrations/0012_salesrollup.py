@@ -0,0 +1,50 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:38
+
+from datetime import timezone
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncHour
+
+
+def backfill_sales_rollup(apps, schema_editor):
+    """Aggregate the already sold pizzas into hourly buckets."""
+    PizzaItem = apps.get_model("festival", "PizzaItem")
+    SalesRollup = apps.get_model("festival", "SalesRollup")
+
+    buckets = (
+        PizzaItem.objects.filter(status="VENDIDA", sold_at__isnull=False)
+        .annotate(hour=TruncHour("sold_at", tzinfo=timezone.utc))
+        .values("branding", "hour", "flavor", "sold_location", "sold_by")
+        .annotate(sold_count=Count("id"), revenue=Sum("price"))
+        .order_by()
+    )
+    SalesRollup.objects.bulk_create([SalesRollup(**bucket) for bucket in buckets], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0011_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SalesRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('branding', models.CharField(choices=[('FESTIVAL', 'Festival'), ('BURGERS', 'Burgers')], default='FESTIVAL', max_length=10)),
+                ('hour', models.DateTimeField()),
+                ('flavor', models.CharField(blank=True, max_length=40)),
+                ('sold_location', models.CharField(blank=True, choices=[('MAIN', 'Principal'), ('SECONDARY', 'Secundario')], default='', max_length=12)),
+                ('sold_by', models.CharField(blank=True, max_length=80)),
+                ('sold_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+            ],
+            options={
+                'ordering': ['hour'],
+                'constraints': [models.UniqueConstraint(fields=('branding', 'hour', 'flavor', 'sold_location', 'sold_by'), name='uniq_salesrollup_bucket')],
+            },
+        ),
+        migrations.RunPython(backfill_sales_rollup, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0012_salesrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='scanevent',
+            index=models.Index(condition=models.Q(('from_status', 'VENDIDA')), fields=['branding', 'id'], name='scanevent_unsold_idx'),
+        ),
+    ]
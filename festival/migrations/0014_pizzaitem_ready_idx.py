@@ -0,0 +1,17 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0013_scanevent_unsold_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pizzaitem',
+            index=models.Index(fields=['branding', 'ready_at'], name='pizza_brand_ready_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.5 on 2026-10-19 15:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('festival', '0014_pizzaitem_ready_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pizzaitem',
+            index=models.Index(fields=['branding', 'id'], name='pizza_brand_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='scanevent',
+            index=models.Index(fields=['branding', '-created_at', '-id'], name='scanevent_brand_latest_idx'),
+        ),
+    ]
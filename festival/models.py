@@ -1,3 +1,4 @@
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 from django.contrib.auth.hashers import check_password, make_password
 
@@ -87,6 +88,11 @@ class Batch(models.Model):
     created_by = models.CharField(max_length=80, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["branding", "-created_at"], name="batch_brand_created_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.code
 
@@ -179,12 +185,63 @@ class PizzaItem(models.Model):
     sold_by = models.CharField(max_length=80, blank=True)
     canceled_by = models.CharField(max_length=80, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["branding", "status", "sold_at"], name="pizza_brand_status_sold_idx"),
+            models.Index(fields=["branding", "created_at"], name="pizza_brand_created_idx"),
+            models.Index(fields=["branding", "ready_at"], name="pizza_brand_ready_idx"),
+            models.Index(fields=["branding", "id"], name="pizza_brand_id_idx"),
+            models.Index(fields=["batch", "id"], name="pizza_batch_id_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.id
 
 
+class BulkOperationKind(models.TextChoices):
+    READY = "READY", "Marcado LISTA"
+    TRANSFER = "TRANSFER", "Transferencia"
+
+
+class BulkOperation(models.Model):
+    branding = models.CharField(
+        max_length=10,
+        choices=[(BrandingType.FESTIVAL, "Festival"), (BrandingType.BURGERS, "Burgers")],
+        default=BrandingType.FESTIVAL,
+        db_index=True,
+    )
+    kind = models.CharField(max_length=12, choices=BulkOperationKind.choices)
+    from_location = models.CharField(
+        max_length=12,
+        choices=[(LocationType.MAIN, "Principal"), (LocationType.SECONDARY, "Secundario")],
+        blank=True,
+        default="",
+    )
+    to_location = models.CharField(
+        max_length=12,
+        choices=[(LocationType.MAIN, "Principal"), (LocationType.SECONDARY, "Secundario")],
+        blank=True,
+        default="",
+    )
+    first_id = models.CharField(max_length=32)
+    last_id = models.CharField(max_length=32)
+    quantity = models.PositiveIntegerField()
+    created_by = models.CharField(max_length=80, blank=True)
+    note = models.CharField(max_length=200, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"{self.kind}: {self.first_id} -> {self.last_id} ({self.quantity})"
+
+
 class ScanEvent(models.Model):
     pizza = models.ForeignKey(PizzaItem, on_delete=models.CASCADE, related_name="events")
+    bulk_operation = models.ForeignKey(
+        BulkOperation, on_delete=models.SET_NULL, null=True, blank=True, related_name="events"
+    )
     branding = models.CharField(
         max_length=10,
         choices=[(BrandingType.FESTIVAL, "Festival"), (BrandingType.BURGERS, "Burgers")],
@@ -208,14 +265,31 @@ class ScanEvent(models.Model):
     )
     from_status = models.CharField(max_length=16, choices=PizzaStatus.choices)
     to_status = models.CharField(max_length=16, choices=PizzaStatus.choices)
+    flavor = models.CharField(max_length=40, blank=True)
     waiter_code = models.CharField(max_length=24, blank=True)
     waiter_name = models.CharField(max_length=80, blank=True)
     note = models.CharField(max_length=200, blank=True)
     undone = models.BooleanField(default=False)
+    business_date = models.DateField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            models.Index(fields=["branding", "mode", "to_status", "created_at"], name="scanevent_brand_mode_idx"),
+            models.Index(fields=["branding", "flavor", "created_at"], name="scanevent_brand_flavor_idx"),
+            models.Index(fields=["branding", "-created_at", "-id"], name="scanevent_brand_latest_idx"),
+            models.Index(
+                fields=["branding", "-created_at"],
+                condition=models.Q(undone=False),
+                name="scanevent_undo_idx",
+            ),
+            models.Index(
+                fields=["branding", "id"],
+                condition=models.Q(from_status=PizzaStatus.VENDIDA),
+                name="scanevent_unsold_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.pizza_id}: {self.from_status}->{self.to_status}"
@@ -250,3 +324,59 @@ class TransferRecord(models.Model):
 
     def __str__(self) -> str:
         return f"{self.branding}: {self.first_id} -> {self.last_id} ({self.quantity})"
+
+
+class ScanReceipt(models.Model):
+    operator = models.ForeignKey(Operator, on_delete=models.CASCADE, related_name="scan_receipts")
+    idempotency_key = models.CharField(max_length=64, blank=True)
+    pizza_code = models.CharField(max_length=32)
+    mode = models.CharField(max_length=20)
+    response = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["operator", "idempotency_key"],
+                condition=~models.Q(idempotency_key=""),
+                name="uniq_scanreceipt_operator_key",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["operator", "pizza_code", "mode", "created_at"], name="scanreceipt_recent_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.operator_id}: {self.mode} {self.pizza_code}"
+
+
+class SalesRollup(models.Model):
+    branding = models.CharField(
+        max_length=10,
+        choices=[(BrandingType.FESTIVAL, "Festival"), (BrandingType.BURGERS, "Burgers")],
+        default=BrandingType.FESTIVAL,
+    )
+    hour = models.DateTimeField()
+    flavor = models.CharField(max_length=40, blank=True)
+    sold_location = models.CharField(
+        max_length=12,
+        choices=[(LocationType.MAIN, "Principal"), (LocationType.SECONDARY, "Secundario")],
+        blank=True,
+        default="",
+    )
+    sold_by = models.CharField(max_length=80, blank=True)
+    sold_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ["hour"]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["branding", "hour", "flavor", "sold_location", "sold_by"],
+                name="uniq_salesrollup_bucket",
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.branding} {self.hour:%Y-%m-%d %H}h {self.flavor}: {self.sold_count}"
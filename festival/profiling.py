@@ -0,0 +1,156 @@
+"""On-demand profiling of single requests, for ADMIN operators only.
+
+A request with `?_profile=1` (or header `X-Profile: 1`) runs under cProfile;
+`mem` instead of `1` also traces allocations with tracemalloc. Each capture is
+a `.prof` file (pstats, snakeviz) plus a `.json` summary in PROFILE_DIR, which
+keeps only the newest PROFILE_MAX_FILES captures.
+"""
+import cProfile
+import io
+import json
+import pstats
+import re
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+PROFILE_PARAM = "_profile"
+PROFILE_HEADER = "X-Profile"
+_NAME_RE = re.compile(r"[0-9]{8}-[0-9]{12}-[a-z0-9-]+")
+# cProfile and tracemalloc are process-wide; a second capture just runs unprofiled.
+_busy = threading.Lock()
+
+
+def requested_mode(request) -> str:
+    value = request.GET.get(PROFILE_PARAM) or request.headers.get(PROFILE_HEADER) or ""
+    value = value.strip().lower()
+    if value == "mem":
+        return "mem"
+    return "cpu" if value in {"1", "cpu", "true"} else ""
+
+
+def _directory() -> Path:
+    directory = Path(settings.PROFILE_DIR)
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _top_functions(stats: pstats.Stats, limit: int, *, own_time: bool = False) -> list[dict]:
+    column = 2 if own_time else 3
+    rows = sorted(stats.stats.items(), key=lambda row: row[1][column], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{Path(filename).name}:{line}({function})" if line else function,
+            "calls": calls,
+            "tottime_ms": round(tottime * 1000, 2),
+            "cumtime_ms": round(cumtime * 1000, 2),
+        }
+        for (filename, line, function), (_, calls, tottime, cumtime, _) in rows
+    ]
+
+
+def _prune(directory: Path) -> None:
+    captures = sorted(directory.glob("*.prof"))
+    for path in captures[: max(0, len(captures) - settings.PROFILE_MAX_FILES)]:
+        path.unlink(missing_ok=True)
+        path.with_suffix(".json").unlink(missing_ok=True)
+
+
+def capture(request, get_response, mode: str, operator_name: str):
+    if not _busy.acquire(blocking=False):
+        return get_response(request)
+    try:
+        if mode == "mem":
+            tracemalloc.start(10)
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            response = profiler.runcall(get_response, request)
+        finally:
+            total_ms = (time.perf_counter() - started) * 1000
+            allocations, peak_kb = [], 0.0
+            if mode == "mem":
+                snapshot = tracemalloc.take_snapshot()
+                peak_kb = tracemalloc.get_traced_memory()[1] / 1024
+                tracemalloc.stop()
+                allocations = [
+                    {"where": str(stat.traceback[0]), "size_kb": round(stat.size / 1024, 1), "count": stat.count}
+                    for stat in snapshot.statistics("lineno")[:25]
+                ]
+    finally:
+        _busy.release()
+
+    now = timezone.localtime()
+    slug = re.sub(r"[^a-z0-9]+", "-", request.path.lower()).strip("-")[:60] or "root"
+    name = f"{now:%Y%m%d-%H%M%S%f}-{slug}"
+    directory = _directory()
+    profiler.dump_stats(directory / f"{name}.prof")
+    stats = pstats.Stats(profiler)
+    query = request.GET.copy()
+    query.pop(PROFILE_PARAM, None)
+    summary = {
+        "name": name,
+        "created_at": now.isoformat(),
+        "method": request.method,
+        "path": request.path + (f"?{query.urlencode()}" if query else ""),
+        "operator": operator_name,
+        "status": response.status_code,
+        "mode": mode,
+        "total_ms": round(total_ms, 1),
+        "peak_kb": round(peak_kb, 1),
+        "top_functions": _top_functions(stats, 15),
+        "hotspots": _top_functions(stats, 5, own_time=True),
+        "allocations": allocations,
+    }
+    (directory / f"{name}.json").write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    _prune(directory)
+    response[PROFILE_HEADER] = name
+    return response
+
+
+def list_profiles() -> list[dict]:
+    directory = Path(settings.PROFILE_DIR)
+    if not directory.is_dir():
+        return []
+    profiles = []
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        try:
+            profiles.append(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            continue
+    return profiles
+
+
+def profile_path(name: str) -> Optional[Path]:
+    if not _NAME_RE.fullmatch(name):
+        return None
+    path = Path(settings.PROFILE_DIR) / f"{name}.prof"
+    return path if path.is_file() else None
+
+
+def profile_report(name: str) -> Optional[str]:
+    path = profile_path(name)
+    if path is None:
+        return None
+    try:
+        summary = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        summary = {}
+    output = io.StringIO()
+    if summary:
+        output.write(
+            f"{summary['method']} {summary['path']} -> {summary['status']} en {summary['total_ms']} ms"
+            f" ({summary['operator']}, {summary['created_at']})\n\n"
+        )
+    stats = pstats.Stats(str(path), stream=output)
+    stats.strip_dirs().sort_stats("cumulative").print_stats(60)
+    if summary.get("allocations"):
+        output.write(f"\nMemoria: pico {summary['peak_kb']} KB; asignaciones vivas al final por linea:\n")
+        for row in summary["allocations"]:
+            output.write(f"{row['size_kb']:>10} KB {row['count']:>8}  {row['where']}\n")
+    return output.getvalue()
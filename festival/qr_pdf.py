@@ -8,6 +8,7 @@ from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfmetrics
 from reportlab.pdfgen import canvas
 
+from .metrics import PDF_SECONDS
 from .models import PizzaItem, Waiter
 
 
@@ -56,6 +57,7 @@ def _wrap_text(
     return lines[:max_lines]
 
 
+@PDF_SECONDS.timed(kind="lote")
 def build_labels_pdf(items: Iterable[PizzaItem]) -> bytes:
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
@@ -112,6 +114,7 @@ def build_labels_pdf(items: Iterable[PizzaItem]) -> bytes:
     return buf.getvalue()
 
 
+@PDF_SECONDS.timed(kind="meseros")
 def build_waiters_labels_pdf(waiters: Iterable[Waiter]) -> bytes:
     buf = BytesIO()
     c = canvas.Canvas(buf, pagesize=A4)
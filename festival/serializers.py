@@ -1,3 +1,6 @@
+from decimal import Decimal
+
+from django.utils import timezone
 from rest_framework import serializers
 
 from .models import Batch, Flavor, PizzaItem, ScanEvent, TransferRecord, Waiter
@@ -91,3 +94,57 @@ class TransferRecordSerializer(serializers.ModelSerializer):
             "note",
             "created_at",
         ]
+
+
+# Hand-rolled equivalents of PizzaItemSerializer / ScanEventSerializer for the scan
+# path. They must keep producing exactly the same output as the DRF classes above
+# (checked by `manage.py bench_serializers`).
+
+_CENTS = Decimal("0.01")
+
+
+def _datetime_data(value):
+    if value is None:
+        return None
+    text = timezone.localtime(value).isoformat()
+    return text[:-6] + "Z" if text.endswith("+00:00") else text
+
+
+def _price_data(value) -> str:
+    if not isinstance(value, Decimal):
+        value = Decimal(str(value).strip())
+    return f"{value.quantize(_CENTS):f}"
+
+
+def pizza_item_data(item: PizzaItem) -> dict:
+    return {
+        "id": item.id,
+        "flavor": item.flavor,
+        "size": item.size,
+        "price": _price_data(item.price),
+        "current_location": item.current_location,
+        "sold_location": item.sold_location,
+        "status": item.status,
+        "created_at": _datetime_data(item.created_at),
+        "ready_at": _datetime_data(item.ready_at),
+        "sold_at": _datetime_data(item.sold_at),
+    }
+
+
+def scan_event_data(event: ScanEvent) -> dict:
+    return {
+        "id": event.id,
+        "pizza_id": event.pizza_id,
+        "mode": event.mode,
+        "actor_name": event.actor_name,
+        "actor_role": event.actor_role,
+        "from_location": event.from_location,
+        "to_location": event.to_location,
+        "from_status": event.from_status,
+        "to_status": event.to_status,
+        "waiter_code": event.waiter_code,
+        "waiter_name": event.waiter_name,
+        "note": event.note,
+        "created_at": _datetime_data(event.created_at),
+        "undone": event.undone,
+    }
@@ -1,13 +1,32 @@
+import time
 from dataclasses import dataclass
+from datetime import timedelta, timezone as dt_timezone
 from decimal import Decimal
+from functools import wraps
 from typing import Optional
 
 from django.conf import settings
-from django.db import transaction
-from django.db.models import Max
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max
 from django.utils import timezone
 
-from .models import Batch, Flavor, LocationType, PizzaItem, PizzaStatus, RoleType, ScanEvent, TransferRecord, Waiter
+from . import metrics
+from .models import (
+    Batch,
+    BulkOperation,
+    BulkOperationKind,
+    Flavor,
+    LocationType,
+    PizzaItem,
+    PizzaStatus,
+    RoleType,
+    SalesRollup,
+    ScanEvent,
+    ScanReceipt,
+    TransferRecord,
+    Waiter,
+)
+from .serializers import pizza_item_data, scan_event_data
 
 
 class TransitionError(Exception):
@@ -21,20 +40,24 @@ class Actor:
     location: str = LocationType.MAIN
 
 
-def _set_transition_fields(item: PizzaItem, to_status: str, actor_name: str) -> None:
+def _set_transition_fields(item: PizzaItem, to_status: str, actor_name: str) -> list[str]:
     now = timezone.now()
     if to_status == PizzaStatus.LISTA:
         item.ready_at = now
         item.ready_by = actor_name
-    elif to_status == PizzaStatus.VENDIDA:
+        return ["ready_at", "ready_by"]
+    if to_status == PizzaStatus.VENDIDA:
         item.sold_at = now
         item.sold_by = actor_name
-    elif to_status in {PizzaStatus.CANCELADA, PizzaStatus.MERMA}:
+        return ["sold_at", "sold_by"]
+    if to_status in {PizzaStatus.CANCELADA, PizzaStatus.MERMA}:
         item.canceled_at = now
         item.canceled_by = actor_name
+        return ["canceled_at", "canceled_by"]
+    return []
 
 
-def _create_event(
+def _build_event(
     *,
     item: PizzaItem,
     actor: Actor,
@@ -46,10 +69,14 @@ def _create_event(
     note: str = "",
     from_location: str = "",
     to_location: str = "",
+    bulk_operation: Optional[BulkOperation] = None,
 ) -> ScanEvent:
-    return ScanEvent.objects.create(
+    return ScanEvent(
         pizza=item,
+        bulk_operation=bulk_operation,
         branding=item.branding,
+        flavor=item.flavor,
+        business_date=timezone.localdate(),
         mode=mode,
         actor_name=actor.name,
         actor_role=actor.role,
@@ -63,29 +90,70 @@ def _create_event(
     )
 
 
-@transaction.atomic
-def process_scan(
-    *,
-    pizza_id: str,
-    mode: str,
-    actor: Actor,
-    flavor_if_empty: str = "",
-    override_pin: str = "",
-    waiter_code: str = "",
-    branding: str = "FESTIVAL",
-) -> tuple[PizzaItem, ScanEvent]:
-    try:
-        item = PizzaItem.objects.select_for_update().get(pk=pizza_id, branding=branding)
-    except PizzaItem.DoesNotExist as exc:
-        raise TransitionError(f"ID no encontrado: {pizza_id}") from exc
+def _create_event(**kwargs) -> ScanEvent:
+    event = _build_event(**kwargs)
+    event.save(force_insert=True)
+    return event
 
-    from_status = item.status
-    from_location = item.current_location
-    mode = mode.upper()
 
-    if flavor_if_empty and not item.flavor:
-        item.flavor = flavor_if_empty.strip().upper()
+SaleKey = tuple[str, object, str, str, str]
+
+
+def _sale_key(item: PizzaItem) -> Optional[SaleKey]:
+    if item.status != PizzaStatus.VENDIDA or item.sold_at is None:
+        return None
+    hour = item.sold_at.astimezone(dt_timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return (item.branding, hour, item.flavor, item.sold_location, item.sold_by)
+
+
+def _bump_sales_rollup(key: SaleKey, count: int, revenue: Decimal) -> None:
+    branding, hour, flavor, sold_location, sold_by = key
+    bucket = {"branding": branding, "hour": hour, "flavor": flavor, "sold_location": sold_location, "sold_by": sold_by}
+    rows = SalesRollup.objects.filter(**bucket)
+    if rows.update(sold_count=F("sold_count") + count, revenue=F("revenue") + revenue):
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(**bucket, sold_count=count, revenue=revenue)
+    except IntegrityError:
+        rows.update(sold_count=F("sold_count") + count, revenue=F("revenue") + revenue)
+
+
+def _update_sales_rollup(changes: list[tuple[Optional[SaleKey], Optional[SaleKey], Decimal]]) -> None:
+    """Move each item's sale between rollup buckets given its (before, after) sale keys."""
+    deltas: dict[SaleKey, list] = {}
+    for before, after, price in changes:
+        if before == after:
+            continue
+        for key, sign in ((before, -1), (after, 1)):
+            if key is None:
+                continue
+            delta = deltas.setdefault(key, [0, Decimal("0")])
+            delta[0] += sign
+            delta[1] += sign * (price or Decimal("0"))
+    for key, (count, revenue) in deltas.items():
+        if count or revenue:
+            _bump_sales_rollup(key, count, revenue)
+
+
+def _get_scan_waiter(waiter_code: str, branding: str) -> Waiter:
+    waiter_code = waiter_code.strip().upper()
+    if not waiter_code:
+        raise TransitionError("Debes escanear primero el QR del mesero")
+    try:
+        return Waiter.objects.get(code=waiter_code, is_active=True, branding=branding)
+    except Waiter.DoesNotExist as exc:
+        raise TransitionError(f"Mesero no encontrado o inactivo: {waiter_code}") from exc
+
 
+def _apply_scan_transition(
+    item: PizzaItem,
+    *,
+    mode: str,
+    actor: Actor,
+    waiter: Optional[Waiter],
+    override_pin: str,
+) -> list[str]:
     if mode == "KITCHEN":
         if actor.location not in {LocationType.MAIN, LocationType.BOTH}:
             raise TransitionError("Solo el local principal puede marcar produccion")
@@ -96,17 +164,8 @@ def process_scan(
         else:
             raise TransitionError(f"No se puede pasar a LISTA desde {item.status}")
     elif mode == "SALES":
-        waiter = None
-        waiter_code = waiter_code.strip().upper()
-        if not waiter_code:
-            raise TransitionError("Debes escanear primero el QR del mesero")
-        try:
-            waiter = Waiter.objects.get(code=waiter_code, is_active=True, branding=branding)
-        except Waiter.DoesNotExist as exc:
-            raise TransitionError(f"Mesero no encontrado o inactivo: {waiter_code}") from exc
         if actor.location not in {LocationType.BOTH, item.current_location}:
             raise TransitionError("Este usuario no puede vender pizzas de ese local")
-
         if item.status == PizzaStatus.LISTA:
             item.status = PizzaStatus.VENDIDA
         elif override_pin == settings.ADMIN_OVERRIDE_PIN:
@@ -116,11 +175,161 @@ def process_scan(
     else:
         raise TransitionError(f"Modo invalido: {mode}")
 
-    _set_transition_fields(item, item.status, actor.name)
+    update_fields = ["status"] + _set_transition_fields(item, item.status, actor.name)
     if mode == "SALES" and waiter:
         item.sold_by = waiter.name
         item.sold_location = item.current_location
-    item.save()
+        update_fields.append("sold_location")
+    return update_fields
+
+
+def _try_conditional_scan(
+    *,
+    pizza_id: str,
+    mode: str,
+    actor: Actor,
+    override_pin: str,
+    waiter_code: str,
+    branding: str,
+    bulk_operation: Optional[BulkOperation] = None,
+) -> Optional[tuple[PizzaItem, ScanEvent]]:
+    """Apply the common scan transitions as a single conditional UPDATE.
+
+    Returns None when the row did not match (unknown ID, wrong status or
+    location, missing waiter...) so the caller can fall back to the locking
+    path, which produces the exact error message.
+    """
+    now = timezone.now()
+    rows = PizzaItem.objects.filter(pk=pizza_id, branding=branding)
+    waiter = None
+    if mode == "KITCHEN":
+        if actor.location not in {LocationType.MAIN, LocationType.BOTH}:
+            return None
+        from_status = PizzaStatus.PREPARACION
+        changes = {"status": PizzaStatus.LISTA, "ready_at": now, "ready_by": actor.name}
+    elif mode == "SALES":
+        waiter_code = waiter_code.strip().upper()
+        if not waiter_code:
+            return None
+        waiter = Waiter.objects.filter(code=waiter_code, is_active=True, branding=branding).first()
+        if waiter is None:
+            return None
+        if actor.location != LocationType.BOTH:
+            rows = rows.filter(current_location=actor.location)
+        from_status = PizzaStatus.LISTA
+        changes = {
+            "status": PizzaStatus.VENDIDA,
+            "sold_at": now,
+            "sold_by": waiter.name,
+            "sold_location": F("current_location"),
+        }
+    else:
+        return None
+
+    if not rows.filter(status=from_status).update(**changes):
+        return None
+
+    item = PizzaItem.objects.get(pk=pizza_id)
+    if mode == "SALES":
+        _update_sales_rollup([(None, _sale_key(item), item.price)])
+    event = _create_event(
+        item=item,
+        actor=actor,
+        from_location=item.current_location,
+        to_location=item.current_location,
+        from_status=from_status,
+        to_status=item.status,
+        mode=mode,
+        waiter_code=waiter.code if waiter else "",
+        waiter_name=waiter.name if waiter else "",
+        note="override" if override_pin == settings.ADMIN_OVERRIDE_PIN else "",
+        bulk_operation=bulk_operation,
+    )
+    return item, event
+
+
+def _observe_scans(*, mode: str, branding: str, outcomes: list[bool], seconds: float) -> None:
+    """Count scan results; successes only once their transaction commits."""
+    mode = str(mode or "").upper()
+    # Unknown modes are rejected anyway; keep them out of the label values.
+    label = mode if mode in {"KITCHEN", "SALES"} else "OTRO"
+    errors = outcomes.count(False)
+    done = len(outcomes) - errors
+    if errors:
+        metrics.SCANS.inc(errors, mode=label, branding=branding, result="error")
+    if not done:
+        return
+
+    def record():
+        metrics.SCANS.inc(done, mode=label, branding=branding, result="ok")
+        for _ in range(done):
+            metrics.SCAN_SECONDS.observe(seconds, mode=label)
+
+    transaction.on_commit(record)
+
+
+def _observe_scan(func):
+    @wraps(func)
+    def wrapper(**kwargs):
+        labels = {"mode": kwargs.get("mode"), "branding": kwargs.get("branding", "FESTIVAL")}
+        started = time.perf_counter()
+        try:
+            result = func(**kwargs)
+        except TransitionError:
+            _observe_scans(**labels, outcomes=[False], seconds=time.perf_counter() - started)
+            raise
+        # Registered in the caller's transaction: dropped if an outer atomic block rolls back.
+        _observe_scans(**labels, outcomes=[True], seconds=time.perf_counter() - started)
+        return result
+
+    return wrapper
+
+
+@_observe_scan
+@transaction.atomic
+def process_scan(
+    *,
+    pizza_id: str,
+    mode: str,
+    actor: Actor,
+    flavor_if_empty: str = "",
+    override_pin: str = "",
+    waiter_code: str = "",
+    branding: str = "FESTIVAL",
+    bulk_operation: Optional[BulkOperation] = None,
+) -> tuple[PizzaItem, ScanEvent]:
+    mode = mode.upper()
+    if not flavor_if_empty:
+        result = _try_conditional_scan(
+            pizza_id=pizza_id,
+            mode=mode,
+            actor=actor,
+            override_pin=override_pin,
+            waiter_code=waiter_code,
+            branding=branding,
+            bulk_operation=bulk_operation,
+        )
+        if result is not None:
+            return result
+
+    try:
+        item = PizzaItem.objects.select_for_update().get(pk=pizza_id, branding=branding)
+    except PizzaItem.DoesNotExist as exc:
+        raise TransitionError(f"ID no encontrado: {pizza_id}") from exc
+
+    from_status = item.status
+    from_location = item.current_location
+    sale_before = _sale_key(item)
+    update_fields: list[str] = []
+
+    if flavor_if_empty and not item.flavor:
+        item.flavor = flavor_if_empty.strip().upper()
+        update_fields.append("flavor")
+
+    waiter = _get_scan_waiter(waiter_code, branding) if mode == "SALES" else None
+    update_fields += _apply_scan_transition(item, mode=mode, actor=actor, waiter=waiter, override_pin=override_pin)
+    item.save(update_fields=update_fields)
+    _update_sales_rollup([(sale_before, _sale_key(item), item.price)])
     event = _create_event(
         item=item,
         actor=actor,
@@ -129,13 +338,239 @@ def process_scan(
         from_status=from_status,
         to_status=item.status,
         mode=mode,
-        waiter_code=waiter.code if mode == "SALES" else "",
-        waiter_name=waiter.name if mode == "SALES" else "",
+        waiter_code=waiter.code if waiter else "",
+        waiter_name=waiter.name if waiter else "",
         note="override" if override_pin == settings.ADMIN_OVERRIDE_PIN else "",
+        bulk_operation=bulk_operation,
     )
     return item, event
 
 
+def find_scan_receipt(
+    *,
+    operator_id: int,
+    pizza_code: str,
+    mode: str,
+    idempotency_key: str = "",
+) -> Optional[ScanReceipt]:
+    """Return the stored response of an already applied scan, if any.
+
+    A matching idempotency key wins; otherwise the same (operator, code, mode)
+    within SCAN_DEDUPE_WINDOW_SECONDS is treated as a scanner double-fire.
+    """
+    now = timezone.now()
+    receipts = ScanReceipt.objects.filter(operator_id=operator_id)
+    if idempotency_key:
+        receipt = receipts.filter(
+            idempotency_key=idempotency_key,
+            created_at__gte=now - timedelta(hours=settings.SCAN_RECEIPT_TTL_HOURS),
+        ).first()
+        if receipt:
+            return receipt
+    if settings.SCAN_DEDUPE_WINDOW_SECONDS <= 0:
+        return None
+    return receipts.filter(
+        pizza_code=pizza_code,
+        mode=mode.upper(),
+        created_at__gte=now - timedelta(seconds=settings.SCAN_DEDUPE_WINDOW_SECONDS),
+    ).first()
+
+
+def record_scan_receipt(
+    *,
+    operator_id: int,
+    pizza_code: str,
+    mode: str,
+    response: dict,
+    idempotency_key: str = "",
+) -> ScanReceipt:
+    receipt = ScanReceipt.objects.create(
+        operator_id=operator_id,
+        idempotency_key=idempotency_key,
+        pizza_code=pizza_code,
+        mode=mode.upper(),
+        response=response,
+    )
+    if _prune_due(receipt.pk):
+        _prune_scan_receipts()
+    return receipt
+
+
+def _prune_due(receipt_id: Optional[int]) -> bool:
+    # SCAN_RECEIPT_PRUNE_EVERY <= 0 turns pruning off instead of dividing by zero.
+    every = settings.SCAN_RECEIPT_PRUNE_EVERY
+    return every > 0 and bool(receipt_id) and receipt_id % every == 0
+
+
+def _prune_scan_receipts() -> None:
+    cutoff = timezone.now() - timedelta(hours=settings.SCAN_RECEIPT_TTL_HOURS)
+    ScanReceipt.objects.filter(created_at__lt=cutoff).delete()
+
+
+def _find_batch_receipts(*, operator_id: int, mode: str, pizza_ids: list[str], keys: list[str]) -> dict[str, ScanReceipt]:
+    """find_scan_receipt for a whole batch in two queries: pizza ID -> receipt."""
+    now = timezone.now()
+    receipts = ScanReceipt.objects.filter(operator_id=operator_id)
+    by_key: dict[str, ScanReceipt] = {}
+    if any(keys):
+        by_key = {
+            receipt.idempotency_key: receipt
+            for receipt in receipts.filter(
+                idempotency_key__in={key for key in keys if key},
+                created_at__gte=now - timedelta(hours=settings.SCAN_RECEIPT_TTL_HOURS),
+            )
+        }
+    by_code: dict[str, ScanReceipt] = {}
+    if settings.SCAN_DEDUPE_WINDOW_SECONDS > 0:
+        # Oldest first, so the newest receipt of each code wins, as in find_scan_receipt.
+        for receipt in receipts.filter(
+            pizza_code__in=set(pizza_ids),
+            mode=mode,
+            created_at__gte=now - timedelta(seconds=settings.SCAN_DEDUPE_WINDOW_SECONDS),
+        ).order_by("created_at"):
+            by_code[receipt.pizza_code] = receipt
+    found: dict[str, ScanReceipt] = {}
+    for pizza_id, key in zip(pizza_ids, keys):
+        receipt = (by_key.get(key) if key else None) or by_code.get(pizza_id)
+        if receipt:
+            found.setdefault(pizza_id, receipt)
+    return found
+
+
+def _forget_scan_receipts(pizza_code: str) -> None:
+    # An admin change must not be masked by the double-fire window.
+    cutoff = timezone.now() - timedelta(seconds=settings.SCAN_DEDUPE_WINDOW_SECONDS)
+    ScanReceipt.objects.filter(pizza_code=pizza_code, created_at__gte=cutoff).delete()
+
+
+@transaction.atomic
+def process_scan_batch(
+    *,
+    pizza_ids: list[str],
+    mode: str,
+    actor: Actor,
+    override_pin: str = "",
+    waiter_code: str = "",
+    branding: str = "FESTIVAL",
+    operator_id: Optional[int] = None,
+    keys: Optional[list[str]] = None,
+) -> list[dict]:
+    """Apply one scan per ID in a single transaction and return per-ID results.
+
+    Items and the waiter are loaded with one query each; invalid IDs are
+    reported individually without aborting the rest of the batch.
+
+    With operator_id, scans are deduplicated against ScanReceipt like single
+    scans (keys[i] is the idempotency key of pizza_ids[i]) and every applied
+    scan records its receipt in this same transaction.
+    """
+    started = time.perf_counter()
+    mode = mode.upper()
+    try:
+        if mode not in {"KITCHEN", "SALES"}:
+            raise TransitionError(f"Modo invalido: {mode}")
+        waiter = _get_scan_waiter(waiter_code, branding) if mode == "SALES" else None
+    except TransitionError:
+        _observe_scans(mode=mode, branding=branding, outcomes=[False] * len(pizza_ids), seconds=0.0)
+        raise
+    keys = [(key or "")[:64] for key in keys] if keys else [""] * len(pizza_ids)
+    receipts = {}
+    if operator_id is not None:
+        receipts = _find_batch_receipts(operator_id=operator_id, mode=mode, pizza_ids=pizza_ids, keys=keys)
+    items = PizzaItem.objects.select_for_update().filter(branding=branding).in_bulk(set(pizza_ids) - set(receipts))
+
+    results: list[dict] = []
+    seen: dict[str, dict] = {}
+    applied: list[tuple[str, str, PizzaItem, ScanEvent]] = []
+    changed: dict[str, PizzaItem] = {}
+    update_fields: set[str] = set()
+    events: list[ScanEvent] = []
+    sale_changes: list[tuple[Optional[SaleKey], Optional[SaleKey], Decimal]] = []
+    for pizza_id, key in zip(pizza_ids, keys):
+        if pizza_id in seen:
+            results.append({**seen[pizza_id], "duplicate": True})
+            continue
+        receipt = receipts.get(pizza_id)
+        if receipt:
+            seen[pizza_id] = {
+                "id": pizza_id,
+                "ok": True,
+                "message": receipt.response["message"],
+                "status": receipt.response["pizza"]["status"],
+            }
+            results.append({**seen[pizza_id], "duplicate": True})
+            continue
+        item = items.get(pizza_id)
+        if item is None:
+            seen[pizza_id] = {"id": pizza_id, "ok": False, "error": f"ID no encontrado: {pizza_id}"}
+            results.append(seen[pizza_id])
+            continue
+        from_status = item.status
+        sale_before = _sale_key(item)
+        try:
+            update_fields.update(
+                _apply_scan_transition(item, mode=mode, actor=actor, waiter=waiter, override_pin=override_pin)
+            )
+        except TransitionError as exc:
+            seen[pizza_id] = {"id": pizza_id, "ok": False, "error": str(exc)}
+            results.append(seen[pizza_id])
+            continue
+        changed[item.pk] = item
+        sale_changes.append((sale_before, _sale_key(item), item.price))
+        event = _build_event(
+            item=item,
+            actor=actor,
+            from_location=item.current_location,
+            to_location=item.current_location,
+            from_status=from_status,
+            to_status=item.status,
+            mode=mode,
+            waiter_code=waiter.code if waiter else "",
+            waiter_name=waiter.name if waiter else "",
+            note="override" if override_pin == settings.ADMIN_OVERRIDE_PIN else "",
+        )
+        events.append(event)
+        applied.append((pizza_id, key, item, event))
+        seen[pizza_id] = {"id": pizza_id, "ok": True, "message": f"OK {item.id} => {item.status}", "status": item.status}
+        results.append(seen[pizza_id])
+
+    if changed:
+        PizzaItem.objects.bulk_update(list(changed.values()), sorted(update_fields))
+    if events:
+        ScanEvent.objects.bulk_create(events)
+    _update_sales_rollup(sale_changes)
+    if operator_id is not None and applied:
+        # Same payload as a single scan, so /api/scan and the replay can answer from it.
+        created = ScanReceipt.objects.bulk_create(
+            [
+                ScanReceipt(
+                    operator_id=operator_id,
+                    idempotency_key=key,
+                    pizza_code=pizza_id,
+                    mode=mode,
+                    response={
+                        "ok": True,
+                        "message": f"OK {item.id} => {item.status}",
+                        "pizza": pizza_item_data(item),
+                        "event": scan_event_data(event),
+                    },
+                )
+                for pizza_id, key, item, event in applied
+            ]
+        )
+        if any(_prune_due(receipt.pk) for receipt in created):
+            _prune_scan_receipts()
+    # One observation per scan actually attempted; duplicates were counted the first time.
+    attempted = [row["ok"] for row in results if not row.get("duplicate")]
+    _observe_scans(
+        mode=mode,
+        branding=branding,
+        outcomes=attempted,
+        seconds=(time.perf_counter() - started) / len(attempted) if attempted else 0.0,
+    )
+    return results
+
+
 @transaction.atomic
 def admin_set_status(
     *,
@@ -158,11 +593,14 @@ def admin_set_status(
 
     from_status = item.status
     from_location = item.current_location
+    sale_before = _sale_key(item)
     item.status = to_status
     if to_status != PizzaStatus.VENDIDA:
         item.sold_location = ""
-    _set_transition_fields(item, to_status, actor.name)
-    item.save()
+    update_fields = ["status", "sold_location"] + _set_transition_fields(item, to_status, actor.name)
+    item.save(update_fields=update_fields)
+    _update_sales_rollup([(sale_before, _sale_key(item), item.price)])
+    _forget_scan_receipts(item.id)
     event = _create_event(
         item=item,
         actor=actor,
@@ -185,13 +623,17 @@ def undo_last(*, pin: str, actor: Actor, branding: str = "FESTIVAL") -> tuple[Pi
         raise TransitionError("No hay eventos para deshacer")
 
     item = PizzaItem.objects.select_for_update().get(pk=last.pizza_id, branding=branding)
+    sale_before = _sale_key(item)
     item.status = last.from_status
     if last.from_location:
         item.current_location = last.from_location
     if item.status != PizzaStatus.VENDIDA:
         item.sold_location = ""
-    _set_transition_fields(item, item.status, actor.name)
-    item.save()
+    update_fields = ["status", "current_location", "sold_location"]
+    update_fields += _set_transition_fields(item, item.status, actor.name)
+    item.save(update_fields=update_fields)
+    _update_sales_rollup([(sale_before, _sale_key(item), item.price)])
+    _forget_scan_receipts(item.id)
 
     last.undone = True
     last.save(update_fields=["undone"])
@@ -400,22 +842,18 @@ def bulk_mark_ready(*, start_id: str, end_id: str, actor: Actor, branding: str =
     if actor.location not in {LocationType.MAIN, LocationType.BOTH}:
         raise TransitionError("Solo el local principal puede marcar produccion")
     base, start_n, end_n = _parse_batch_range(start_id, end_id)
-    count = 0
-    first_done = ""
-    last_done = ""
-    event_ids: list[int] = []
+    operation = BulkOperation.objects.create(
+        branding=branding,
+        kind=BulkOperationKind.READY,
+        first_id=f"{base}-{start_n:04d}",
+        last_id=f"{base}-{end_n:04d}",
+        quantity=end_n - start_n + 1,
+        created_by=actor.name,
+    )
     for number in range(start_n, end_n + 1):
         pizza_id = f"{base}-{number:04d}"
-        item, event = process_scan(pizza_id=pizza_id, mode="KITCHEN", actor=actor, branding=branding)
-        count += 1
-        event_ids.append(event.id)
-        if not first_done:
-            first_done = item.id
-        last_done = item.id
-    if event_ids:
-        bulk_note = f"bulk-ready|{first_done}|{last_done}|{count}"
-        ScanEvent.objects.filter(id__in=event_ids).update(note=bulk_note)
-    return count, first_done, last_done
+        process_scan(pizza_id=pizza_id, mode="KITCHEN", actor=actor, branding=branding, bulk_operation=operation)
+    return operation.quantity, operation.first_id, operation.last_id
 
 
 @transaction.atomic
@@ -473,7 +911,17 @@ def transfer_items_between_locations(
     transferred = 0
     first_id = f"{base}-{start_n:04d}"
     last_id = f"{base}-{end_n:04d}"
-    event_ids: list[int] = []
+    operation = BulkOperation.objects.create(
+        branding=branding,
+        kind=BulkOperationKind.TRANSFER,
+        from_location=from_location,
+        to_location=to_location,
+        first_id=first_id,
+        last_id=last_id,
+        quantity=end_n - start_n + 1,
+        created_by=actor.name,
+        note=(note or "").strip(),
+    )
     for number in range(start_n, end_n + 1):
         pizza_id = f"{base}-{number:04d}"
         try:
@@ -487,7 +935,7 @@ def transfer_items_between_locations(
             raise TransitionError(f"{pizza_id} debe estar LISTA para mover entre locales")
         item.current_location = to_location
         item.save(update_fields=["current_location"])
-        event = _create_event(
+        _create_event(
             item=item,
             actor=actor,
             from_location=from_location,
@@ -496,14 +944,9 @@ def transfer_items_between_locations(
             to_status=item.status,
             mode="TRANSFER",
             note=(note or "").strip(),
+            bulk_operation=operation,
         )
-        event_ids.append(event.id)
         transferred += 1
-    if event_ids:
-        bulk_note = f"transfer-range|{from_location}|{to_location}|{first_id}|{last_id}|{transferred}"
-        if note:
-            bulk_note = f"{bulk_note}|{note.strip()}"
-        ScanEvent.objects.filter(id__in=event_ids).update(note=bulk_note)
     transfer = TransferRecord.objects.create(
         branding=branding,
         from_location=from_location,
@@ -0,0 +1,125 @@
+"""Slow request and slow SQL log, one JSON object per line.
+
+RequestPerfMiddleware calls log_request() when a request takes at least
+SLOW_REQUEST_MS or runs a statement of at least SLOW_QUERY_MS (0 turns either
+check off). Every write reopens SLOW_LOG_PATH under an exclusive lock, so the
+gunicorn workers share one file and rotate it (SLOW_LOG_MAX_BYTES, keeping
+SLOW_LOG_BACKUPS old files) without losing lines.
+
+SQL parameters carry session keys, PIN hashes and waiter data, so they are
+only written with SLOW_LOG_PARAMS=1; otherwise the log keeps their count and
+masks the quoted literals in EXPLAIN output too.
+"""
+import json
+import os
+import re
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows dev boxes: single process, no locking needed
+    fcntl = None
+
+MAX_EXPLAINS = 3
+MAX_SQL_CHARS = 4000
+MAX_PARAMS_CHARS = 500
+IGNORED_PARAMS = {"_profile", "pin", "password"}
+# Postgres EXPLAIN inlines the bound values as quoted literals.
+_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def _filters(request) -> dict:
+    filters = {}
+    for key in sorted(request.GET):
+        if key in IGNORED_PARAMS:
+            continue
+        values = [value.strip() for value in request.GET.getlist(key) if value.strip()]
+        if values:
+            filters[key] = values[0] if len(values) == 1 else values
+    return filters
+
+
+def _explain(sql: str, params) -> str:
+    # Postgres wraps combined queries as "(SELECT ...) UNION (SELECT ...)".
+    words = sql.lstrip().lstrip("(").split(None, 1)
+    if not words or words[0].upper() not in {"SELECT", "WITH"}:
+        return ""
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(f"{connection.ops.explain_query_prefix()} {sql}", params)
+            return "\n".join(" ".join(str(column) for column in row) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f"EXPLAIN fallo: {exc}"
+
+
+def _params(params) -> str:
+    if settings.SLOW_LOG_PARAMS:
+        return repr(params)[:MAX_PARAMS_CHARS]
+    return f"<{len(params or ())} ocultos>"
+
+
+def _rotate(path: Path) -> None:
+    for index in range(settings.SLOW_LOG_BACKUPS - 1, 0, -1):
+        source = path.with_name(f"{path.name}.{index}")
+        if source.exists():
+            source.replace(path.with_name(f"{path.name}.{index + 1}"))
+    if settings.SLOW_LOG_BACKUPS:
+        path.replace(path.with_name(f"{path.name}.1"))
+    else:
+        path.unlink()
+
+
+def write(entry: dict) -> None:
+    path = Path(settings.SLOW_LOG_PATH)
+    line = json.dumps(entry, ensure_ascii=False, default=str) + "\n"
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path.with_name(f"{path.name}.lock"), "a") as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            if path.exists() and path.stat().st_size + len(line) > settings.SLOW_LOG_MAX_BYTES:
+                _rotate(path)
+            with open(path, "a", encoding="utf-8") as log:
+                log.write(line)
+    except OSError:
+        # The log is a diagnostic aid; never fail the request over it.
+        pass
+
+
+def log_request(request, response, *, route: str, queries: int, db_ms: float, total_ms: float, slow_queries: list) -> None:
+    session = getattr(request, "session", None)
+    match = getattr(request, "resolver_match", None)
+    statements = []
+    for index, (seconds, sql, params, many) in enumerate(sorted(slow_queries, key=lambda row: -row[0])):
+        plan = _explain(sql, params) if index < MAX_EXPLAINS and not many else ""
+        statements.append(
+            {
+                "ms": round(seconds * 1000, 1),
+                "sql": sql[:MAX_SQL_CHARS],
+                "params": _params(params),
+                "explain": plan if settings.SLOW_LOG_PARAMS else _LITERAL_RE.sub("'?'", plan),
+            }
+        )
+    write(
+        {
+            "at": timezone.localtime().isoformat(),
+            "pid": os.getpid(),
+            "kind": "request" if settings.SLOW_REQUEST_MS and total_ms >= settings.SLOW_REQUEST_MS else "query",
+            "method": request.method,
+            "route": route,
+            "url_name": match.url_name if match else "",
+            "status": response.status_code,
+            "role": session.get("operator_role", "") if session is not None else "",
+            "operator": session.get("operator_username", "") if session is not None else "",
+            "branding": session.get("active_branding", "") if session is not None else "",
+            "filters": _filters(request),
+            "queries": queries,
+            "db_ms": round(db_ms, 1),
+            "total_ms": round(total_ms, 1),
+            "slow_queries": statements,
+        }
+    )
@@ -23,7 +23,14 @@ urlpatterns = [
     path("api/flavors/<int:flavor_id>/reactivate", views.FlavorReactivateAPIView.as_view(), name="api-flavor-reactivate"),
     path("api/kitchen/bulk-ready", views.KitchenBulkReadyAPIView.as_view(), name="api-kitchen-bulk-ready"),
     path("api/scan", views.ScanAPIView.as_view(), name="api-scan"),
+    path("api/scan/batch", views.BatchScanAPIView.as_view(), name="api-scan-batch"),
+    path("api/scan/replay", views.ReplayScanAPIView.as_view(), name="api-scan-replay"),
     path("api/dashboard", views.DashboardDataAPIView.as_view(), name="api-dashboard"),
+    path("api/dashboard/timeseries", views.DashboardTimeseriesAPIView.as_view(), name="api-dashboard-timeseries"),
+    path("api/dashboard/kitchen-times", views.KitchenTimesAPIView.as_view(), name="api-dashboard-kitchen-times"),
+    path("api/_perf", views.PerfAPIView.as_view(), name="api-perf"),
+    path("metrics", views.metrics_view, name="metrics"),
+    path("api/admin/profiles/<str:name>", views.ProfileDetailAPIView.as_view(), name="api-admin-profile"),
     path("api/dashboard/sales-export.xls", views.SalesExportXLSAPIView.as_view(), name="api-dashboard-sales-export"),
     path("api/inventory", views.InventoryDataAPIView.as_view(), name="api-inventory"),
     path("api/waiters", views.WaiterAPIView.as_view(), name="api-waiters"),
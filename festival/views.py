@@ -1,18 +1,30 @@
-from datetime import date
+import hashlib
+import hmac
+import json
+import threading
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal, InvalidOperation
+from functools import wraps
 
 from django.conf import settings
-from django.db.models import Count, Max, Min, Sum
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Max, Min, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
 from django.db.models import Q
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import redirect, render
 from django.core.paginator import Paginator, EmptyPage
 from django.views.decorators.csrf import ensure_csrf_cookie
+from django.utils import timezone
 from django.utils.html import escape
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from .admission import INVENTORY, heavy_slot
+from .analytics import TIMESERIES_BUCKET_MINUTES, bucket_floor, kitchen_times, sales_timeseries
 from .auth_utils import (
     ROLE_LABEL_MAP,
     bootstrap_default_operators,
@@ -24,15 +36,18 @@ from .auth_utils import (
     require_roles_api,
     require_roles_web,
 )
-from .models import Batch, BrandingType, Flavor, LocationType, PizzaItem, PizzaStatus, RoleType, ScanEvent, TransferRecord, Waiter
+from .metrics import DASHBOARD_POLLS, EXPORT_BYTES, render as render_metrics
+from .middleware import perf_ring
+from .models import Batch, BrandingType, BulkOperation, Flavor, LocationType, PizzaItem, PizzaStatus, RoleType, SalesRollup, ScanEvent, TransferRecord, Waiter
+from .profiling import list_profiles, profile_path, profile_report
 from .qr_pdf import build_labels_pdf, build_waiters_labels_pdf
 from .serializers import (
     BatchSerializer,
     FlavorSerializer,
-    PizzaItemSerializer,
-    ScanEventSerializer,
     TransferRecordSerializer,
     WaiterSerializer,
+    pizza_item_data,
+    scan_event_data,
 )
 from .services import (
     Actor,
@@ -44,8 +59,11 @@ from .services import (
     create_waiter,
     deactivate_flavor,
     delete_flavor,
+    find_scan_receipt,
     process_scan,
+    process_scan_batch,
     reactivate_flavor,
+    record_scan_receipt,
     return_items_to_main,
     transfer_items_to_secondary,
     undo_last,
@@ -79,24 +97,28 @@ def _active_flavors(branding: str):
     return Flavor.objects.filter(branding=branding, is_active=True).order_by("sort_order", "name")
 
 
-def _serialize_dashboard_event(event: ScanEvent) -> dict:
-    return {
-        "id": event.id,
-        "pizza_id": event.pizza_id,
-        "mode": event.mode,
-        "actor_name": event.actor_name,
-        "actor_role": event.actor_role,
-        "from_location": event.from_location,
-        "to_location": event.to_location,
-        "from_status": event.from_status,
-        "to_status": event.to_status,
-        "waiter_code": event.waiter_code,
-        "waiter_name": event.waiter_name,
-        "note": event.note,
-        "created_at": event.created_at.isoformat() if event.created_at else "",
-        "undone": event.undone,
-        "summary_count": 1,
-    }
+DASHBOARD_EVENT_FIELDS = (
+    "id",
+    "pizza_id",
+    "mode",
+    "actor_name",
+    "actor_role",
+    "from_location",
+    "to_location",
+    "from_status",
+    "to_status",
+    "waiter_code",
+    "waiter_name",
+    "note",
+    "created_at",
+    "undone",
+)
+
+
+def _serialize_dashboard_event(row: dict) -> dict:
+    """Dashboard row from a ScanEvent.values(*DASHBOARD_EVENT_FIELDS) dict."""
+    created_at = row["created_at"]
+    return {**row, "created_at": created_at.isoformat() if created_at else "", "summary_count": 1}
 
 
 def _split_item_id(item_id: str) -> tuple[str, int] | None:
@@ -150,94 +172,60 @@ def _serialize_inventory_ranges(items: list[PizzaItem]) -> list[dict]:
     return ranges
 
 
-def _group_dashboard_events(events: list[ScanEvent], *, allow_grouping: bool = True) -> list[dict]:
+def _serialize_bulk_operation_row(operation: BulkOperation, head: dict) -> dict:
+    row = _serialize_dashboard_event(head)
+    row.update(
+        {
+            "pizza_id": f"{operation.first_id} -> {operation.last_id}",
+            "from_location": operation.from_location or head["from_location"],
+            "to_location": operation.to_location or head["to_location"],
+            "waiter_code": "",
+            "waiter_name": "",
+            "summary_count": operation.quantity,
+        }
+    )
+    return row
+
+
+def _dashboard_rows(latest_qs, *, allow_grouping: bool = True):
+    """Rows of (bulk_operation_id, event_id, created_at), newest first.
+
+    Events that belong to a BulkOperation collapse into one row headed by the
+    newest event of the operation, so the database can count and page them
+    straight off the (branding, -created_at, -id) index.
+    """
     if not allow_grouping:
-        return [_serialize_dashboard_event(event) for event in events]
-
-    grouped: list[dict] = []
-    index = 0
-    while index < len(events):
-        event = events[index]
-        note = (event.note or "").strip()
-        if event.mode == "KITCHEN" and note.startswith("bulk-ready|"):
-            parts = note.split("|")
-            first_id = event.pizza_id
-            last_id = event.pizza_id
-            summary_count = 1
-            if len(parts) >= 4:
-                first_id = parts[1] or first_id
-                last_id = parts[2] or last_id
-                try:
-                    summary_count = max(1, int(parts[3]))
-                except ValueError:
-                    summary_count = 1
-            next_index = index + 1
-            while next_index < len(events) and (events[next_index].note or "").strip() == note:
-                next_index += 1
-            grouped.append(
-                {
-                    "id": event.id,
-                    "pizza_id": f"{first_id} -> {last_id}",
-                    "mode": event.mode,
-                    "actor_name": event.actor_name,
-                    "actor_role": event.actor_role,
-                    "from_location": event.from_location,
-                    "to_location": event.to_location,
-                    "from_status": event.from_status,
-                    "to_status": event.to_status,
-                    "waiter_code": "",
-                    "waiter_name": "",
-                    "note": note,
-                    "created_at": event.created_at.isoformat() if event.created_at else "",
-                    "undone": event.undone,
-                    "summary_count": summary_count,
-                }
-            )
-            index = next_index
-            continue
-        if event.mode == "TRANSFER" and note.startswith("transfer-range|"):
-            parts = note.split("|")
-            from_location = event.from_location
-            to_location = event.to_location
-            first_id = event.pizza_id
-            last_id = event.pizza_id
-            summary_count = 1
-            if len(parts) >= 6:
-                from_location = parts[1] or from_location
-                to_location = parts[2] or to_location
-                first_id = parts[3] or first_id
-                last_id = parts[4] or last_id
-                try:
-                    summary_count = max(1, int(parts[5]))
-                except ValueError:
-                    summary_count = 1
-            next_index = index + 1
-            while next_index < len(events) and (events[next_index].note or "").strip() == note:
-                next_index += 1
-            grouped.append(
-                {
-                    "id": event.id,
-                    "pizza_id": f"{first_id} -> {last_id}",
-                    "mode": event.mode,
-                    "actor_name": event.actor_name,
-                    "actor_role": event.actor_role,
-                    "from_location": from_location,
-                    "to_location": to_location,
-                    "from_status": event.from_status,
-                    "to_status": event.to_status,
-                    "waiter_code": "",
-                    "waiter_name": "",
-                    "note": note,
-                    "created_at": event.created_at.isoformat() if event.created_at else "",
-                    "undone": event.undone,
-                    "summary_count": summary_count,
-                }
-            )
-            index = next_index
-            continue
-        grouped.append(_serialize_dashboard_event(event))
-        index += 1
-    return grouped
+        return latest_qs.values_list("bulk_operation", "id", "created_at").order_by("-created_at", "-id")
+    heads = (
+        latest_qs.order_by()
+        .filter(bulk_operation=OuterRef("bulk_operation"))
+        .values("bulk_operation")
+        .annotate(head_id=Max("id"))
+        .values("head_id")
+    )
+    return (
+        latest_qs.filter(Q(bulk_operation__isnull=True) | Q(id=Subquery(heads)))
+        .values_list("bulk_operation", "id", "created_at")
+        .order_by("-created_at", "-id")
+    )
+
+
+def _materialize_dashboard_rows(rows: list[tuple], *, allow_grouping: bool = True) -> list[dict]:
+    events = {
+        row["id"]: row
+        for row in ScanEvent.objects.filter(id__in=[event_id for _, event_id, _ in rows]).values(*DASHBOARD_EVENT_FIELDS)
+    }
+    operations = {}
+    if allow_grouping:
+        operations = BulkOperation.objects.in_bulk([bulk_id for bulk_id, _, _ in rows if bulk_id])
+    serialized = []
+    for bulk_id, event_id, _ in rows:
+        event = events[event_id]
+        if bulk_id in operations:
+            serialized.append(_serialize_bulk_operation_row(operations[bulk_id], event))
+        else:
+            serialized.append(_serialize_dashboard_event(event))
+    return serialized
 
 
 def landing_view(request):
@@ -282,6 +270,133 @@ def _parse_iso_date(value: str, field_name: str) -> tuple[date | None, str | Non
         return None, f"{field_name} invalida. Formato esperado: YYYY-MM-DD"
 
 
+def _local_day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _filter_sales(
+    queryset,
+    *,
+    flavor: str,
+    waiter_name: str,
+    location: str,
+    date_from: date | None,
+    date_to: date | None,
+    time_field: str = "sold_at",
+):
+    """Local dates become a half-open [start, end) range on time_field so the DB can use its index.
+
+    Works on PizzaItem (sold_at) and on SalesRollup (hour), which share the other field names.
+    """
+    if flavor:
+        queryset = queryset.filter(flavor=flavor)
+    if waiter_name:
+        queryset = queryset.filter(sold_by__icontains=waiter_name)
+    if location:
+        queryset = queryset.filter(sold_location=location)
+    if date_from:
+        queryset = queryset.filter(**{f"{time_field}__gte": _local_day_start(date_from)})
+    if date_to:
+        queryset = queryset.filter(**{f"{time_field}__lt": _local_day_start(date_to + timedelta(days=1))})
+    return queryset
+
+
+_inflight_locks: dict[str, threading.Lock] = {}
+_inflight_guard = threading.Lock()
+
+
+def _single_flight(key: str, compute, ttl: int):
+    """Share one computation between identical concurrent requests in this process.
+
+    The result is kept in the cache for `ttl` seconds, so polls landing right
+    after it also reuse it instead of recomputing.
+    """
+    result = cache.get(key)
+    if result is not None:
+        return result
+    with _inflight_guard:
+        lock = _inflight_locks.setdefault(key, threading.Lock())
+    try:
+        with lock:
+            result = cache.get(key)
+            if result is None:
+                result = compute()
+                cache.set(key, result, ttl)
+    finally:
+        with _inflight_guard:
+            if _inflight_locks.get(key) is lock:
+                del _inflight_locks[key]
+    return result
+
+
+def _is_not_modified(request, etag: str) -> bool:
+    return etag in [tag.strip() for tag in request.headers.get("If-None-Match", "").split(",")]
+
+
+def _with_etag(response: Response, etag: str) -> Response:
+    response["ETag"] = etag
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _version_etag(request, *version) -> str:
+    raw = "|".join(str(part) for part in (request.get_full_path(), *version))
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"'
+
+
+def _not_modified(etag: str) -> Response:
+    return _with_etag(Response(status=status.HTTP_304_NOT_MODIFIED), etag)
+
+
+def _heavy_busy() -> Response:
+    retry_after = settings.HEAVY_JOB_RETRY_AFTER
+    return Response(
+        {"ok": False, "error": f"Servidor ocupado con otra descarga pesada; reintentar en {retry_after} s"},
+        status=status.HTTP_429_TOO_MANY_REQUESTS,
+        headers={"Retry-After": str(retry_after)},
+    )
+
+
+def _heavy_endpoint(kind: str, roles: list[str]):
+    """Check roles first, then hold a heavy slot; the view gets the operator after the request."""
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            # Rejected requests must never hold a slot a real report is waiting for.
+            operator, error, error_status = require_roles_api(request, roles)
+            if error:
+                return Response(error, status=error_status)
+            with heavy_slot(kind) as admitted:
+                if not admitted:
+                    return _heavy_busy()
+                return method(self, request, operator, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _items_version(branding: str) -> tuple:
+    # Every item change leaves a ScanEvent; new batches only add items.
+    last_event_id = ScanEvent.objects.filter(branding=branding).aggregate(last=Max("id")).get("last") or 0
+    last_item_at = PizzaItem.objects.filter(branding=branding).aggregate(last=Max("created_at")).get("last")
+    return last_event_id, last_item_at
+
+
+def _collection_version(queryset) -> tuple:
+    version = queryset.order_by().aggregate(total=Count("id"), last=Max("id"))
+    return version["total"], version["last"]
+
+
+def _etag_response(request, payload: dict) -> Response:
+    body = json.dumps(payload, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    etag = f'"{hashlib.md5(body.encode()).hexdigest()}"'
+    if _is_not_modified(request, etag):
+        return _not_modified(etag)
+    return _with_etag(Response(payload), etag)
+
+
 def _normalize_scanned_code(value: str) -> str:
     raw = (value or "").strip().upper()
     for bad_sep in ("'", "’", "`", "´", "‘"):
@@ -291,6 +406,76 @@ def _normalize_scanned_code(value: str) -> str:
     return raw
 
 
+def _scan_mode_error(operator, mode: str) -> Response | None:
+    if operator.role == "KITCHEN" and mode != "KITCHEN":
+        return Response({"ok": False, "error": "Modo no permitido para este usuario"}, status=403)
+    if operator.role == "SALES" and mode != "SALES":
+        return Response({"ok": False, "error": "Modo no permitido para este usuario"}, status=403)
+    if operator.role in {"OPERATOR", "CASHIER_OPS"} and mode not in {"KITCHEN", "SALES"}:
+        return Response({"ok": False, "error": "Modo no permitido para este usuario"}, status=403)
+    if operator.role == "ADMIN" and mode not in {"KITCHEN", "SALES"}:
+        return Response({"ok": False, "error": "Modo invalido"}, status=400)
+    return None
+
+
+def _scan_actor(operator) -> Actor:
+    return Actor(
+        name=operator.username,
+        role=ROLE_LABEL_MAP.get(operator.role, RoleType.ADMIN),
+        location=operator.location,
+    )
+
+
+def _scan_once(
+    *,
+    operator,
+    branding: str,
+    pizza_id: str,
+    mode: str,
+    flavor_if_empty: str = "",
+    override_pin: str = "",
+    waiter_code: str = "",
+    idempotency_key: str = "",
+) -> tuple[dict, int]:
+    receipt_lookup = {
+        "operator_id": operator.id,
+        "pizza_code": pizza_id,
+        "mode": mode,
+        "idempotency_key": idempotency_key[:64],
+    }
+    receipt = find_scan_receipt(**receipt_lookup)
+    if receipt:
+        return {**receipt.response, "duplicate": True}, status.HTTP_200_OK
+
+    try:
+        with transaction.atomic():
+            item, event = process_scan(
+                pizza_id=pizza_id,
+                mode=mode,
+                actor=_scan_actor(operator),
+                flavor_if_empty=flavor_if_empty,
+                override_pin=override_pin,
+                waiter_code=waiter_code,
+                branding=branding,
+            )
+            payload = {
+                "ok": True,
+                "message": f"OK {item.id} => {item.status}",
+                "pizza": pizza_item_data(item),
+                "event": scan_event_data(event),
+            }
+            record_scan_receipt(response=payload, **receipt_lookup)
+    except TransitionError as exc:
+        return {"ok": False, "error": str(exc)}, status.HTTP_400_BAD_REQUEST
+    except IntegrityError:
+        # Same idempotency key committed concurrently by another worker.
+        receipt = find_scan_receipt(**receipt_lookup)
+        if not receipt:
+            raise
+        return {**receipt.response, "duplicate": True}, status.HTTP_200_OK
+    return payload, status.HTTP_200_OK
+
+
 def login_view(request, forced_branding: str | None = None):
     bootstrap_default_operators()
     if not forced_branding:
@@ -376,6 +561,31 @@ def home_view(request):
     return redirect("/dashboard/")
 
 
+def scan_pool_home_view(request):
+    # /app/ on the scan pool (WEB_POOL=scan): only the stations are served there.
+    operator = get_current_operator(request)
+    if not operator:
+        return redirect("/")
+    if not get_active_branding(request):
+        request.session["active_branding"] = get_allowed_brandings(operator)[0]
+    if operator.role in {"KITCHEN", "OPERATOR", "CASHIER_OPS", "ADMIN"}:
+        return redirect("/kitchen/")
+    if operator.role == "SALES":
+        return redirect("/sales/")
+    return scan_pool_only_view(request)
+
+
+def scan_pool_only_view(request, path: str = ""):
+    if request.path.startswith("/api/"):
+        return JsonResponse({"ok": False, "error": "Ruta no disponible en el pool de escaneos"}, status=404)
+    return render(
+        request,
+        "festival/scan_pool_only.html",
+        {"current_branding": request.session.get("active_branding"), "path": request.path},
+        status=404,
+    )
+
+
 @require_roles_web(["KITCHEN", "SALES", "BATCHES", "OPERATOR", "CASHIER_OPS", "SOCIO", "ADMIN"])
 def branding_select_view(request):
     return redirect("/")
@@ -460,6 +670,7 @@ def admin_ops_view(request):
             "current_branding": request.current_branding,
             "flavors": _active_flavors(request.current_branding),
             "recent_transfers": TransferRecord.objects.filter(branding=request.current_branding)[:8],
+            "profiles": list_profiles() if request.current_operator.role == "ADMIN" else [],
         },
     )
 
@@ -574,38 +785,169 @@ class ScanAPIView(APIView):
         if not pizza_id:
             return Response({"ok": False, "error": "ID requerido"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if operator.role == "KITCHEN" and mode != "KITCHEN":
-            return Response({"ok": False, "error": "Modo no permitido para este usuario"}, status=403)
-        if operator.role == "SALES" and mode != "SALES":
-            return Response({"ok": False, "error": "Modo no permitido para este usuario"}, status=403)
-        if operator.role in {"OPERATOR", "CASHIER_OPS"} and mode not in {"KITCHEN", "SALES"}:
-            return Response({"ok": False, "error": "Modo no permitido para este usuario"}, status=403)
-        if operator.role == "ADMIN" and mode not in {"KITCHEN", "SALES"}:
-            return Response({"ok": False, "error": "Modo invalido"}, status=400)
+        mode_error = _scan_mode_error(operator, mode)
+        if mode_error:
+            return mode_error
 
-        try:
-            item, event = process_scan(
-                pizza_id=pizza_id,
-                mode=mode,
-                actor=Actor(
-                    name=operator.username,
-                    role=ROLE_LABEL_MAP.get(operator.role, RoleType.ADMIN),
-                    location=operator.location,
-                ),
-                flavor_if_empty=flavor_if_empty,
-                override_pin=override_pin,
-                waiter_code=waiter_code,
-                branding=active_branding,
+        idempotency_key = (request.data.get("idempotency_key") or request.headers.get("Idempotency-Key") or "").strip()
+        payload, status_code = _scan_once(
+            operator=operator,
+            branding=active_branding,
+            pizza_id=pizza_id,
+            mode=mode,
+            flavor_if_empty=flavor_if_empty,
+            override_pin=override_pin,
+            waiter_code=waiter_code,
+            idempotency_key=idempotency_key,
+        )
+        return Response(payload, status=status_code)
+
+
+class ReplayScanAPIView(APIView):
+    max_scans = 500
+    text_fields = ("id", "mode", "idempotency_key", "override_pin", "waiter_code")
+
+    def post(self, request):
+        operator, error, error_status = require_roles_api(request, ["KITCHEN", "SALES", "OPERATOR", "CASHIER_OPS", "ADMIN"])
+        if error:
+            return Response(error, status=error_status)
+        active_branding = get_active_branding(request)
+
+        scans = request.data.get("scans")
+        if not isinstance(scans, list) or not all(isinstance(scan, dict) for scan in scans):
+            return Response({"ok": False, "error": "scans debe ser una lista"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(scans) > self.max_scans:
+            return Response(
+                {"ok": False, "error": f"Maximo {self.max_scans} escaneos por envio"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        results = []
+        # Each scan commits on its own (see _scan_once): a long offline queue must not
+        # hold row or write locks while the other stations keep scanning.
+        for scan in sorted(scans, key=lambda row: str(row.get("scanned_at") or "")):
+            fields = {name: scan.get(name) or "" for name in self.text_fields}
+            if not all(isinstance(value, str) for value in fields.values()):
+                key = fields["idempotency_key"]
+                results.append(
+                    {
+                        "id": fields["id"] if isinstance(fields["id"], str) else str(fields["id"]),
+                        "idempotency_key": key.strip() if isinstance(key, str) else "",
+                        "scanned_at": str(scan.get("scanned_at") or ""),
+                        "ok": False,
+                        "error": "Escaneo invalido: los campos deben ser texto",
+                    }
+                )
+                continue
+            pizza_id = _normalize_scanned_code(fields["id"])
+            mode = fields["mode"].strip().upper()
+            result = {
+                "id": pizza_id,
+                "idempotency_key": fields["idempotency_key"].strip(),
+                "scanned_at": str(scan.get("scanned_at") or ""),
+            }
+            mode_error = _scan_mode_error(operator, mode)
+            if not pizza_id:
+                payload = {"ok": False, "error": "ID requerido"}
+            elif mode_error:
+                payload = mode_error.data
+            else:
+                payload, _ = _scan_once(
+                    operator=operator,
+                    branding=active_branding,
+                    pizza_id=pizza_id,
+                    mode=mode,
+                    override_pin=fields["override_pin"].strip(),
+                    waiter_code=_normalize_scanned_code(fields["waiter_code"]),
+                    idempotency_key=result["idempotency_key"],
+                )
+            result["ok"] = payload["ok"]
+            if payload["ok"]:
+                result["message"] = payload["message"]
+                result["status"] = payload["pizza"]["status"]
+                result["duplicate"] = bool(payload.get("duplicate"))
+            else:
+                result["error"] = payload["error"]
+            results.append(result)
+
+        done = sum(1 for row in results if row["ok"] and not row["duplicate"])
+        duplicates = sum(1 for row in results if row["ok"] and row["duplicate"])
+        return Response(
+            {
+                "ok": True,
+                "message": f"{done} de {len(results)} escaneos sincronizados ({duplicates} ya aplicados)",
+                "processed": done,
+                "duplicates": duplicates,
+                "failed": len(results) - done - duplicates,
+                "results": results,
+            }
+        )
+
+
+class BatchScanAPIView(APIView):
+    max_ids = 50
+
+    def post(self, request):
+        operator, error, error_status = require_roles_api(request, ["KITCHEN", "SALES", "OPERATOR", "CASHIER_OPS", "ADMIN"])
+        if error:
+            return Response(error, status=error_status)
+        active_branding = get_active_branding(request)
+
+        raw_ids = request.data.get("ids")
+        if not isinstance(raw_ids, list):
+            return Response({"ok": False, "error": "ids debe ser una lista"}, status=status.HTTP_400_BAD_REQUEST)
+        pizza_ids, keys = [], []
+        for raw in raw_ids:
+            # Each entry is a bare ID or {"id": ..., "key": <idempotency key>}.
+            code, key = (raw.get("id"), raw.get("key") or "") if isinstance(raw, dict) else (raw, "")
+            if not isinstance(code, (str, int)) or not isinstance(key, str):
+                return Response({"ok": False, "error": "ids invalidos"}, status=status.HTTP_400_BAD_REQUEST)
+            code = _normalize_scanned_code(str(code))
+            if code:
+                pizza_ids.append(code)
+                keys.append(key.strip())
+        if not pizza_ids:
+            return Response({"ok": False, "error": "ID requerido"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(pizza_ids) > self.max_ids:
+            return Response(
+                {"ok": False, "error": f"Maximo {self.max_ids} IDs por lote"},
+                status=status.HTTP_400_BAD_REQUEST,
             )
+        mode = (request.data.get("mode") or "").strip().upper()
+        override_pin = (request.data.get("override_pin") or "").strip()
+        waiter_code = _normalize_scanned_code(request.data.get("waiter_code"))
+
+        mode_error = _scan_mode_error(operator, mode)
+        if mode_error:
+            return mode_error
+
+        batch = {
+            "pizza_ids": pizza_ids,
+            "mode": mode,
+            "actor": _scan_actor(operator),
+            "override_pin": override_pin,
+            "waiter_code": waiter_code,
+            "branding": active_branding,
+            "operator_id": operator.id,
+            "keys": keys,
+        }
+        try:
+            try:
+                results = process_scan_batch(**batch)
+            except IntegrityError:
+                # A key committed concurrently by another worker; the retry answers from its receipt.
+                results = process_scan_batch(**batch)
         except TransitionError as exc:
             return Response({"ok": False, "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
+        done = sum(1 for row in results if row["ok"])
         return Response(
             {
                 "ok": True,
-                "message": f"OK {item.id} => {item.status}",
-                "pizza": PizzaItemSerializer(item).data,
-                "event": ScanEventSerializer(event).data,
+                "message": f"{done} de {len(results)} escaneos procesados",
+                "processed": done,
+                "failed": len(results) - done,
+                "results": results,
             }
         )
 
@@ -649,7 +991,10 @@ class WaiterAPIView(APIView):
             return Response(error, status=error_status)
         active_branding = get_active_branding(request)
         waiters = Waiter.objects.filter(is_active=True, branding=active_branding).order_by("name")
-        return Response({"ok": True, "waiters": WaiterSerializer(waiters, many=True).data})
+        etag = _version_etag(request, active_branding, *_collection_version(waiters))
+        if _is_not_modified(request, etag):
+            return _not_modified(etag)
+        return _with_etag(Response({"ok": True, "waiters": WaiterSerializer(waiters, many=True).data}), etag)
 
     def post(self, request):
         operator, error, error_status = require_roles_api(request, ["BATCHES", "OPERATOR", "ADMIN"])
@@ -682,6 +1027,9 @@ class WaiterGroupedAPIView(APIView):
         allowed_brandings = set(get_allowed_brandings(operator))
         brandings = [branding for branding in [BrandingType.FESTIVAL, BrandingType.BURGERS] if branding in allowed_brandings]
         waiters_qs = Waiter.objects.filter(is_active=True, branding__in=brandings).order_by("branding", "name", "code")
+        etag = _version_etag(request, *brandings, *_collection_version(waiters_qs))
+        if _is_not_modified(request, etag):
+            return _not_modified(etag)
         if query:
             waiters_qs = waiters_qs.filter(Q(code__icontains=query) | Q(name__icontains=query))
         waiters_by_branding = list(waiters_qs)
@@ -701,14 +1049,12 @@ class WaiterGroupedAPIView(APIView):
                 }
             )
 
-        return Response({"ok": True, "groups": grouped})
+        return _with_etag(Response({"ok": True, "groups": grouped}), etag)
 
 
 class WaiterLabelsAPIView(APIView):
-    def get(self, request):
-        operator, error, error_status = require_roles_api(request, ["BATCHES", "OPERATOR", "ADMIN", "SALES"])
-        if error:
-            return Response(error, status=error_status)
+    @_heavy_endpoint("etiquetas_meseros", ["BATCHES", "OPERATOR", "ADMIN", "SALES"])
+    def get(self, request, operator):
         active_branding = get_active_branding(request)
         requested_branding = (request.GET.get("branding") or "").strip().upper()
         target_branding = active_branding
@@ -833,6 +1179,27 @@ class BatchGenerateAPIView(APIView):
         )
 
 
+def _batch_list(branding: str, *, query: str = ""):
+    """Newest 80 batches with their item totals.
+
+    The totals are correlated subqueries instead of a join + GROUP BY, so only
+    the 80 listed batches are counted and the order comes from the index.
+    """
+    items = PizzaItem.objects.filter(batch=OuterRef("pk")).order_by().values("batch")
+    batches = (
+        Batch.objects.filter(branding=branding)
+        .annotate(
+            total_items=Coalesce(Subquery(items.annotate(total=Count("id")).values("total")), 0),
+            first_item_id=Subquery(items.annotate(first=Min("id")).values("first")),
+            last_item_id=Subquery(items.annotate(last=Max("id")).values("last")),
+        )
+        .order_by("-created_at", "-id")
+    )
+    if query:
+        batches = batches.filter(Q(code__icontains=query) | Q(notes__icontains=query) | Q(created_by__icontains=query))
+    return batches[:80]
+
+
 class BatchListAPIView(APIView):
     def get(self, request):
         operator, error, error_status = require_roles_api(request, ["BATCHES", "OPERATOR", "ADMIN"])
@@ -840,27 +1207,22 @@ class BatchListAPIView(APIView):
             return Response(error, status=error_status)
         active_branding = get_active_branding(request)
         query = (request.GET.get("q") or "").strip()
-        batches = (
-            Batch.objects.filter(branding=active_branding)
-            .annotate(
-                total_items=Count("pizzas"),
-                first_item_id=Min("pizzas__id"),
-                last_item_id=Max("pizzas__id"),
-            )
-            .order_by("-created_at", "-id")
+        last_item_at = PizzaItem.objects.filter(branding=active_branding).aggregate(last=Max("created_at")).get("last")
+        etag = _version_etag(
+            request,
+            active_branding,
+            last_item_at,
+            *_collection_version(Batch.objects.filter(branding=active_branding)),
         )
-        if query:
-            batches = batches.filter(
-                Q(code__icontains=query) | Q(notes__icontains=query) | Q(created_by__icontains=query)
-            )
-        return Response({"ok": True, "batches": BatchSerializer(batches[:80], many=True).data})
+        if _is_not_modified(request, etag):
+            return _not_modified(etag)
+        batches = _batch_list(active_branding, query=query)
+        return _with_etag(Response({"ok": True, "batches": BatchSerializer(batches, many=True).data}), etag)
 
 
 class BatchLabelsAPIView(APIView):
-    def get(self, request, batch_code: str):
-        operator, error, error_status = require_roles_api(request, ["BATCHES", "OPERATOR", "ADMIN"])
-        if error:
-            return Response(error, status=error_status)
+    @_heavy_endpoint("etiquetas_lote", ["BATCHES", "OPERATOR", "ADMIN"])
+    def get(self, request, operator, batch_code: str):
         active_branding = get_active_branding(request)
 
         queryset = PizzaItem.objects.filter(batch__code=batch_code, branding=active_branding).order_by("id")
@@ -879,6 +1241,17 @@ class BatchLabelsAPIView(APIView):
         return response
 
 
+def _inventory_items(branding: str, *, batch: str = "", status_filter: str = "", location: str = ""):
+    items_qs = PizzaItem.objects.select_related("batch").filter(branding=branding).order_by("id")
+    if batch:
+        items_qs = items_qs.filter(id__startswith=batch)
+    if status_filter:
+        items_qs = items_qs.filter(status=status_filter)
+    if location:
+        items_qs = items_qs.filter(current_location=location)
+    return items_qs
+
+
 class InventoryDataAPIView(APIView):
     def get(self, request):
         operator, error, error_status = require_roles_api(
@@ -891,17 +1264,162 @@ class InventoryDataAPIView(APIView):
         batch = (request.GET.get("batch") or "").strip().upper()
         status_filter = (request.GET.get("status") or "").strip().upper()
         location = (request.GET.get("location") or "").strip().upper()
+        etag = _version_etag(request, active_branding, *_items_version(active_branding))
+        if _is_not_modified(request, etag):
+            return _not_modified(etag)
+
+        items_qs = _inventory_items(active_branding, batch=batch, status_filter=status_filter, location=location)
+
+        # Polls answered with 304 above never take a slot.
+        with heavy_slot("inventario", pool=INVENTORY) as admitted:
+            if not admitted:
+                return _heavy_busy()
+            ranges = _serialize_inventory_ranges(list(items_qs))
+        return _with_etag(Response({"ok": True, "ranges": ranges}), etag)
+
+
+def _dashboard_events(
+    branding: str,
+    *,
+    mode: str = "",
+    to_status: str = "",
+    pizza_id: str = "",
+    flavor: str = "",
+    waiter_name: str = "",
+    location: str = "",
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    """Dashboard event filters, all on ScanEvent's own columns (no join to the pizzas)."""
+    latest_qs = ScanEvent.objects.filter(branding=branding)
+    if mode:
+        latest_qs = latest_qs.filter(mode=mode)
+    if to_status:
+        latest_qs = latest_qs.filter(to_status=to_status)
+    if pizza_id:
+        latest_qs = latest_qs.filter(pizza__id__icontains=pizza_id)
+    if flavor:
+        latest_qs = latest_qs.filter(flavor=flavor)
+    if waiter_name:
+        latest_qs = latest_qs.filter(waiter_name__icontains=waiter_name)
+    if location:
+        latest_qs = latest_qs.filter(to_location=location)
+    if date_from:
+        latest_qs = latest_qs.filter(business_date__gte=date_from)
+    if date_to:
+        latest_qs = latest_qs.filter(business_date__lte=date_to)
+    return latest_qs
+
+
+def _status_counts(branding: str):
+    return PizzaItem.objects.filter(branding=branding).values("status").annotate(total=Count("id")).order_by()
+
+
+def _dashboard_payload(
+    *,
+    branding: str,
+    page: int,
+    page_size: int,
+    mode: str,
+    to_status: str,
+    pizza_id: str,
+    flavor: str,
+    waiter_name: str,
+    location: str,
+    date_from: date | None,
+    date_to: date | None,
+) -> dict:
+    counts = {row["status"]: row["total"] for row in _status_counts(branding)}
+    for key in PizzaStatus.values:
+        counts.setdefault(key, 0)
+    revenue_qs = _filter_sales(
+        SalesRollup.objects.filter(branding=branding),
+        flavor=flavor,
+        waiter_name=waiter_name,
+        location=location,
+        date_from=date_from,
+        date_to=date_to,
+        time_field="hour",
+    )
+    revenue = revenue_qs.aggregate(total=Sum("revenue")).get("total")
+    sold_by_location = {
+        row["sold_location"]: row["total"]
+        for row in SalesRollup.objects.filter(branding=branding)
+        .exclude(sold_location="")
+        .values("sold_location")
+        .annotate(total=Sum("sold_count"))
+        .order_by()
+    }
+    transfer_qs = TransferRecord.objects.filter(
+        branding=branding,
+        from_location=LocationType.MAIN,
+        to_location=LocationType.SECONDARY,
+    )
+    transferred_to_secondary = transfer_qs.aggregate(total=Sum("quantity")).get("total") or 0
+
+    latest_qs = _dashboard_events(
+        branding,
+        mode=mode,
+        to_status=to_status,
+        pizza_id=pizza_id,
+        flavor=flavor,
+        waiter_name=waiter_name,
+        location=location,
+        date_from=date_from,
+        date_to=date_to,
+    )
 
-        items_qs = PizzaItem.objects.select_related("batch").filter(branding=active_branding).order_by("id")
-        if batch:
-            items_qs = items_qs.filter(id__startswith=batch)
-        if status_filter:
-            items_qs = items_qs.filter(status=status_filter)
-        if location:
-            items_qs = items_qs.filter(current_location=location)
+    allow_grouping = not bool(pizza_id)
+    latest_rows = _dashboard_rows(latest_qs, allow_grouping=allow_grouping)
+
+    paginator = Paginator(latest_rows, page_size)
+    if paginator.count == 0:
+        latest_items = []
+        pagination = {
+            "page": 1,
+            "page_size": page_size,
+            "total_pages": 1,
+            "total_items": 0,
+            "has_next": False,
+            "has_previous": False,
+        }
+    else:
+        try:
+            latest_page = paginator.page(page)
+        except EmptyPage:
+            latest_page = paginator.page(paginator.num_pages)
+        latest_items = _materialize_dashboard_rows(list(latest_page.object_list), allow_grouping=allow_grouping)
+        pagination = {
+            "page": latest_page.number,
+            "page_size": page_size,
+            "total_pages": paginator.num_pages,
+            "total_items": paginator.count,
+            "has_next": latest_page.has_next(),
+            "has_previous": latest_page.has_previous(),
+        }
 
-        ranges = _serialize_inventory_ranges(list(items_qs))
-        return Response({"ok": True, "ranges": ranges})
+    return {
+        "ok": True,
+        "counts": counts,
+        "revenue_sold": str(revenue or "0"),
+        "sold_by_location": {
+            "MAIN": sold_by_location.get(LocationType.MAIN, 0),
+            "SECONDARY": sold_by_location.get(LocationType.SECONDARY, 0),
+        },
+        "transferred_to_secondary": transferred_to_secondary,
+        "latest": latest_items,
+        "pagination": pagination,
+        "filters": {
+            "mode": mode,
+            "to_status": to_status,
+            "pizza_id": pizza_id,
+            "flavor": flavor,
+            "waiter_name": waiter_name,
+            "location": location,
+            "date_from": date_from.isoformat() if date_from else "",
+            "date_to": date_to.isoformat() if date_to else "",
+        },
+    }
 
 
 class DashboardDataAPIView(APIView):
@@ -944,107 +1462,108 @@ class DashboardDataAPIView(APIView):
         if sales_filter_active and not to_status:
             to_status = PizzaStatus.VENDIDA
 
-        counts = {
-            row["status"]: row["total"]
-            for row in PizzaItem.objects.filter(branding=active_branding).values("status").annotate(total=Count("id"))
+        filters = {
+            "page": page,
+            "page_size": page_size,
+            "mode": mode,
+            "to_status": to_status,
+            "pizza_id": pizza_id,
+            "flavor": flavor,
+            "waiter_name": waiter_name,
+            "location": location,
+            "date_from": date_from,
+            "date_to": date_to,
         }
-        for key in PizzaStatus.values:
-            counts.setdefault(key, 0)
-        revenue_qs = PizzaItem.objects.filter(status=PizzaStatus.VENDIDA, branding=active_branding)
-        if flavor:
-            revenue_qs = revenue_qs.filter(flavor=flavor)
-        if waiter_name:
-            revenue_qs = revenue_qs.filter(sold_by__icontains=waiter_name)
-        if location:
-            revenue_qs = revenue_qs.filter(sold_location=location)
-        if date_from:
-            revenue_qs = revenue_qs.filter(sold_at__date__gte=date_from)
-        if date_to:
-            revenue_qs = revenue_qs.filter(sold_at__date__lte=date_to)
-        revenue = revenue_qs.aggregate(total=Sum("price")).get("total")
-        sold_by_location = {
-            row["sold_location"]: row["total"]
-            for row in PizzaItem.objects.filter(
-                branding=active_branding,
-                status=PizzaStatus.VENDIDA,
+        last_event_id, last_item_at = _items_version(active_branding)
+        etag = _version_etag(request, active_branding, last_event_id, last_item_at)
+        if _is_not_modified(request, etag):
+            DASHBOARD_POLLS.inc(branding=active_branding, status="304")
+            return _not_modified(etag)
+        DASHBOARD_POLLS.inc(branding=active_branding, status="200")
+        digest = hashlib.md5(
+            json.dumps({**filters, "last_item_at": last_item_at}, cls=DjangoJSONEncoder, sort_keys=True).encode()
+        ).hexdigest()
+        payload = _single_flight(
+            f"dashboard:{active_branding}:{last_event_id}:{digest}",
+            lambda: _dashboard_payload(branding=active_branding, **filters),
+            settings.DASHBOARD_CACHE_SECONDS,
+        )
+        return _with_etag(Response(payload), etag)
+
+
+class DashboardTimeseriesAPIView(APIView):
+    def get(self, request):
+        operator, error, error_status = require_roles_api(request, ["SALES", "OPERATOR", "CASHIER_OPS", "SOCIO", "ADMIN"])
+        if error:
+            return Response(error, status=error_status)
+        active_branding = get_active_branding(request)
+
+        try:
+            hours = int(request.GET.get("hours", 6))
+        except ValueError:
+            hours = 6
+        hours = min(24, max(1, hours))
+        flavor = (request.GET.get("flavor") or "").strip().upper()
+        location = (request.GET.get("location") or "").strip().upper()
+
+        end = bucket_floor(timezone.now()) + timedelta(minutes=TIMESERIES_BUCKET_MINUTES)
+        start = end - timedelta(hours=hours)
+        buckets = []
+        for bucket_start, rows in sales_timeseries(branding=active_branding, start=start, end=end):
+            if flavor:
+                rows = [row for row in rows if row["flavor"] == flavor]
+            if location:
+                rows = [row for row in rows if row["location"] == location]
+            buckets.append(
+                {
+                    "start": timezone.localtime(bucket_start).isoformat(),
+                    "count": sum(row["count"] for row in rows),
+                    "revenue": str(sum((Decimal(row["revenue"]) for row in rows), Decimal("0"))),
+                    "series": rows,
+                }
             )
-            .exclude(sold_location="")
-            .values("sold_location")
-            .annotate(total=Count("id"))
-        }
-        transfer_qs = TransferRecord.objects.filter(
-            branding=active_branding,
-            from_location=LocationType.MAIN,
-            to_location=LocationType.SECONDARY,
+        return _etag_response(
+            request,
+            {
+                "ok": True,
+                "bucket_minutes": TIMESERIES_BUCKET_MINUTES,
+                "from": timezone.localtime(start).isoformat(),
+                "to": timezone.localtime(end).isoformat(),
+                "buckets": buckets,
+                "filters": {"hours": hours, "flavor": flavor, "location": location},
+            },
         )
-        transferred_to_secondary = transfer_qs.aggregate(total=Sum("quantity")).get("total") or 0
-
-        latest_qs = ScanEvent.objects.select_related("pizza").filter(branding=active_branding)
-        if mode:
-            latest_qs = latest_qs.filter(mode=mode)
-        if to_status:
-            latest_qs = latest_qs.filter(to_status=to_status)
-        if pizza_id:
-            latest_qs = latest_qs.filter(pizza__id__icontains=pizza_id)
-        if flavor:
-            latest_qs = latest_qs.filter(pizza__flavor=flavor)
-        if waiter_name:
-            latest_qs = latest_qs.filter(waiter_name__icontains=waiter_name)
-        if location:
-            latest_qs = latest_qs.filter(to_location=location)
-        if date_from:
-            latest_qs = latest_qs.filter(pizza__sold_at__date__gte=date_from)
-        if date_to:
-            latest_qs = latest_qs.filter(pizza__sold_at__date__lte=date_to)
-
-        latest_items_all = list(latest_qs)
-        latest_grouped = _group_dashboard_events(latest_items_all, allow_grouping=not bool(pizza_id))
-
-        paginator = Paginator(latest_grouped, page_size)
-        if paginator.count == 0:
-            latest_items = []
-            pagination = {
-                "page": 1,
-                "page_size": page_size,
-                "total_pages": 1,
-                "total_items": 0,
-                "has_next": False,
-                "has_previous": False,
-            }
-        else:
-            try:
-                latest_page = paginator.page(page)
-            except EmptyPage:
-                latest_page = paginator.page(paginator.num_pages)
-            latest_items = list(latest_page.object_list)
-            pagination = {
-                "page": latest_page.number,
-                "page_size": page_size,
-                "total_pages": paginator.num_pages,
-                "total_items": paginator.count,
-                "has_next": latest_page.has_next(),
-                "has_previous": latest_page.has_previous(),
-            }
 
+
+class KitchenTimesAPIView(APIView):
+    def get(self, request):
+        operator, error, error_status = require_roles_api(request, ["SALES", "OPERATOR", "CASHIER_OPS", "SOCIO", "ADMIN"])
+        if error:
+            return Response(error, status=error_status)
+        active_branding = get_active_branding(request)
+
+        date_from, date_from_error = _parse_iso_date(request.GET.get("date_from"), "date_from")
+        date_to, date_to_error = _parse_iso_date(request.GET.get("date_to"), "date_to")
+        if date_from_error:
+            return Response({"ok": False, "error": date_from_error}, status=status.HTTP_400_BAD_REQUEST)
+        if date_to_error:
+            return Response({"ok": False, "error": date_to_error}, status=status.HTTP_400_BAD_REQUEST)
+        if date_from and date_to and date_from > date_to:
+            return Response(
+                {"ok": False, "error": "date_from no puede ser mayor que date_to"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        report = kitchen_times(
+            branding=active_branding,
+            start=_local_day_start(date_from) if date_from else None,
+            end=_local_day_start(date_to + timedelta(days=1)) if date_to else None,
+        )
         return Response(
             {
                 "ok": True,
-                "counts": counts,
-                "revenue_sold": str(revenue or "0"),
-                "sold_by_location": {
-                    "MAIN": sold_by_location.get(LocationType.MAIN, 0),
-                    "SECONDARY": sold_by_location.get(LocationType.SECONDARY, 0),
-                },
-                "transferred_to_secondary": transferred_to_secondary,
-                "latest": latest_items,
-                "pagination": pagination,
+                **report,
                 "filters": {
-                    "mode": mode,
-                    "to_status": to_status,
-                    "pizza_id": pizza_id,
-                    "flavor": flavor,
-                    "waiter_name": waiter_name,
-                    "location": location,
                     "date_from": date_from.isoformat() if date_from else "",
                     "date_to": date_to.isoformat() if date_to else "",
                 },
@@ -1052,11 +1571,75 @@ class DashboardDataAPIView(APIView):
         )
 
 
-class SalesExportXLSAPIView(APIView):
+class PerfAPIView(APIView):
+    max_recent = 200
+
     def get(self, request):
-        operator, error, error_status = require_roles_api(request, ["SALES", "OPERATOR", "CASHIER_OPS", "SOCIO", "ADMIN"])
+        operator, error, error_status = require_roles_api(request, ["ADMIN"])
         if error:
             return Response(error, status=error_status)
+        try:
+            recent = min(self.max_recent, max(0, int(request.GET.get("recent", 0))))
+        except ValueError:
+            return Response({"ok": False, "error": "recent debe ser entero"}, status=status.HTTP_400_BAD_REQUEST)
+
+        entries = perf_ring.entries()
+        return Response(
+            {
+                "ok": True,
+                "ring_size": settings.PERF_RING_SIZE,
+                "requests": len(entries),
+                "since": (
+                    datetime.fromtimestamp(entries[0][0], tz=timezone.get_current_timezone()).isoformat() if entries else ""
+                ),
+                "routes": perf_ring.summary(),
+                "recent": [
+                    {
+                        "method": method,
+                        "route": route,
+                        "status": status_code,
+                        "queries": queries,
+                        "db_ms": round(db_ms, 2),
+                        "total_ms": round(total_ms, 2),
+                    }
+                    for _, method, route, status_code, queries, db_ms, total_ms in (entries[-recent:] if recent else [])
+                ],
+            }
+        )
+
+
+class ProfileDetailAPIView(APIView):
+    def get(self, request, name):
+        operator, error, error_status = require_roles_api(request, ["ADMIN"])
+        if error:
+            return Response(error, status=error_status)
+        if request.GET.get("download") == "1":
+            path = profile_path(name)
+            if path is None:
+                return Response({"ok": False, "error": "Perfil no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+            response = HttpResponse(path.read_bytes(), content_type="application/octet-stream")
+            response["Content-Disposition"] = f'attachment; filename="{name}.prof"'
+            return response
+        report = profile_report(name)
+        if report is None:
+            return Response({"ok": False, "error": "Perfil no encontrado"}, status=status.HTTP_404_NOT_FOUND)
+        return HttpResponse(report, content_type="text/plain; charset=utf-8")
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token:
+        allowed = hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}")
+    else:
+        allowed = request.META.get("REMOTE_ADDR") in {"127.0.0.1", "::1"}
+    if not allowed:
+        return HttpResponse("No autorizado", status=403, content_type="text/plain; charset=utf-8")
+    return HttpResponse(render_metrics(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+class SalesExportXLSAPIView(APIView):
+    @_heavy_endpoint("ventas_xls", ["SALES", "OPERATOR", "CASHIER_OPS", "SOCIO", "ADMIN"])
+    def get(self, request, operator):
         active_branding = get_active_branding(request)
 
         flavor = (request.GET.get("flavor") or "").strip().upper()
@@ -1074,19 +1657,14 @@ class SalesExportXLSAPIView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        sales_qs = PizzaItem.objects.filter(status=PizzaStatus.VENDIDA, branding=active_branding).order_by(
-            "sold_at", "id"
+        sales_qs = _filter_sales(
+            PizzaItem.objects.filter(status=PizzaStatus.VENDIDA, branding=active_branding).order_by("sold_at", "id"),
+            flavor=flavor,
+            waiter_name=waiter_name,
+            location=location,
+            date_from=date_from,
+            date_to=date_to,
         )
-        if flavor:
-            sales_qs = sales_qs.filter(flavor=flavor)
-        if waiter_name:
-            sales_qs = sales_qs.filter(sold_by__icontains=waiter_name)
-        if location:
-            sales_qs = sales_qs.filter(sold_location=location)
-        if date_from:
-            sales_qs = sales_qs.filter(sold_at__date__gte=date_from)
-        if date_to:
-            sales_qs = sales_qs.filter(sold_at__date__lte=date_to)
 
         filename = "ventas"
         if date_from or date_to:
@@ -1169,6 +1747,7 @@ class SalesExportXLSAPIView(APIView):
             html,
             content_type="application/vnd.ms-excel; charset=utf-8",
         )
+        EXPORT_BYTES.observe(len(response.content), kind="ventas_xls")
         response["Content-Disposition"] = f'attachment; filename="{filename}.xls"'
         return response
 
@@ -1197,7 +1776,7 @@ class AdminStatusAPIView(APIView):
             return Response({"ok": False, "error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response(
-            {"ok": True, "pizza": PizzaItemSerializer(item).data, "event": ScanEventSerializer(event).data}
+            {"ok": True, "pizza": pizza_item_data(item), "event": scan_event_data(event)}
         )
 
 
@@ -1220,8 +1799,8 @@ class UndoAPIView(APIView):
             {
                 "ok": True,
                 "message": f"Deshecho: {item.id} => {item.status}",
-                "pizza": PizzaItemSerializer(item).data,
-                "event": ScanEventSerializer(event).data,
+                "pizza": pizza_item_data(item),
+                "event": scan_event_data(event),
             }
         )
 
@@ -21,6 +21,8 @@
   let currentPage = 1;
   const pageSize = 20;
   let latestPagination = null;
+  let dashboardUrl = "";
+  let dashboardEtag = "";
   const filters = {
     mode: "",
     to_status: "",
@@ -121,11 +123,18 @@
   }
 
   async function loadDashboard() {
-    const res = await fetch(`/api/dashboard?${buildQuery()}`);
+    const url = `/api/dashboard?${buildQuery()}`;
+    const headers = url === dashboardUrl && dashboardEtag ? { "If-None-Match": dashboardEtag } : {};
+    const res = await fetch(url, { headers });
+    if (res.status === 304) {
+      return;
+    }
     const data = await res.json();
     if (!res.ok || !data.ok) {
       return;
     }
+    dashboardUrl = url;
+    dashboardEtag = res.headers.get("ETag") || "";
     const c = data.counts;
     setCount("kpi-preparacion", c.PREPARACION);
     setCount("kpi-lista", c.LISTA);
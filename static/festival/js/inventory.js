@@ -6,6 +6,10 @@
   const clearBtn = document.getElementById("inventoryClearBtn");
   const msg = document.getElementById("inventoryMsg");
   const body = document.getElementById("inventoryBody");
+  let inventoryUrl = "";
+  let inventoryEtag = "";
+  let inventoryCount = 0;
+  let retryTimer = null;
 
   function locationLabel(value) {
     if (value === "MAIN") {
@@ -40,6 +44,7 @@
   }
 
   async function loadInventory() {
+    clearTimeout(retryTimer);
     msg.textContent = "Cargando inventario...";
     const params = new URLSearchParams();
     const batch = batchInput.value.trim().toUpperCase();
@@ -55,15 +60,32 @@
       params.set("location", location);
     }
     const qs = params.toString() ? `?${params.toString()}` : "";
-    const res = await fetch(`/api/inventory${qs}`);
+    const url = `/api/inventory${qs}`;
+    const headers = url === inventoryUrl && inventoryEtag ? { "If-None-Match": inventoryEtag } : {};
+    const res = await fetch(url, { headers });
+    if (res.status === 304) {
+      msg.textContent = `${inventoryCount} rango(s) encontrados.`;
+      return;
+    }
+    if (res.status === 429) {
+      // Server busy with other heavy jobs: keep the current table and retry.
+      const wait = Math.max(1, parseInt(res.headers.get("Retry-After") || "", 10) || 5);
+      msg.textContent = `Servidor ocupado; se reintenta en ${wait} s.`;
+      retryTimer = setTimeout(loadInventory, wait * 1000);
+      return;
+    }
     const data = await res.json();
     if (!res.ok || !data.ok) {
+      inventoryEtag = "";
       msg.textContent = data.error || "Error al cargar inventario";
       renderRows([]);
       return;
     }
     const ranges = data.ranges || [];
     renderRows(ranges);
+    inventoryUrl = url;
+    inventoryEtag = res.headers.get("ETag") || "";
+    inventoryCount = ranges.length;
     msg.textContent = `${ranges.length} rango(s) encontrados.`;
   }
 
@@ -26,6 +26,8 @@
   const bulkEndId = document.getElementById("bulkEndId");
   const bulkReadyBtn = document.getElementById("bulkReadyBtn");
   const bulkMsg = document.getElementById("bulkMsg");
+  const offlineStatus = document.getElementById("offlineStatus");
+  const scanLog = document.getElementById("scanLog");
 
   const canUseNativeCamera = !!(navigator.mediaDevices && window.BarcodeDetector);
   const canUseHtml5Qrcode = !!(navigator.mediaDevices && window.Html5Qrcode);
@@ -38,10 +40,29 @@
   let isProcessingCode = false;
   let rafId = null;
   let waitersByCode = {};
+  let waitersEtag = "";
   let currentWaiter = null;
   let pendingPizza = null;
   let pendingTimerId = null;
   const pendingTimeoutMs = 45000;
+  const batchWindowMs = 300;
+  const batchMaxSize = 12;
+  let scanQueue = [];
+  let queueWaiterCode = "";
+  let flushTimerId = null;
+  const offlineStorageKey = `scanOfflineQueue:${mode}:${currentOperator}`;
+  const offlineReplayChunk = 200;
+  let offlineQueue = loadOfflineQueue();
+  let replayingOffline = false;
+  const maxInFlight = 4;
+  const scanLogMax = 10;
+  const waitingJobs = [];
+  const finishedJobs = new Map();
+  const inFlightCodes = new Set();
+  let inFlightCount = 0;
+  let jobSeq = 0;
+  let nextPaintSeq = 1;
+  let scanLogRows = [];
 
   function normalizeScannedCode(value) {
     let raw = (value || "").trim().toUpperCase();
@@ -181,11 +202,15 @@
       return;
     }
     try {
-      const res = await fetch("/api/waiters");
+      const res = await fetch("/api/waiters", { headers: waitersEtag ? { "If-None-Match": waitersEtag } : {} });
+      if (res.status === 304) {
+        return;
+      }
       const data = await res.json();
       if (!res.ok || !data.ok || !Array.isArray(data.waiters)) {
         return;
       }
+      waitersEtag = res.headers.get("ETag") || "";
       const indexed = {};
       for (const waiter of data.waiters) {
         indexed[normalizeScannedCode(waiter.code)] = waiter;
@@ -196,24 +221,312 @@
     }
   }
 
-  async function sendScan(code) {
-    const payload = {
+  function newScanKey() {
+    if (window.crypto && window.crypto.randomUUID) {
+      return window.crypto.randomUUID();
+    }
+    return `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 12)}`;
+  }
+
+  function selectedWaiterCode() {
+    return mode === "SALES" && currentWaiter ? currentWaiter.code : "";
+  }
+
+  function newScanEntry(code, waiterCode) {
+    return {
       id: normalizeScannedCode(code),
       mode: mode,
+      waiter_code: waiterCode,
+      idempotency_key: newScanKey(),
+      scanned_at: new Date().toISOString(),
+    };
+  }
+
+  function loadOfflineQueue() {
+    try {
+      const stored = JSON.parse(window.localStorage.getItem(offlineStorageKey) || "[]");
+      return Array.isArray(stored) ? stored : [];
+    } catch (err) {
+      return [];
+    }
+  }
+
+  function saveOfflineQueue() {
+    try {
+      window.localStorage.setItem(offlineStorageKey, JSON.stringify(offlineQueue));
+    } catch (err) {
+      // storage full or disabled: the queue stays in memory
+    }
+  }
+
+  function renderOfflineState() {
+    if (!offlineStatus) {
+      return;
+    }
+    offlineStatus.classList.toggle("hidden", offlineQueue.length === 0);
+    offlineStatus.textContent = `Sin conexion: ${offlineQueue.length} escaneo(s) pendientes de sincronizar.`;
+  }
+
+  function queueOffline(entries) {
+    offlineQueue = offlineQueue.concat(entries);
+    saveOfflineQueue();
+    renderOfflineState();
+    paintNeutral(`Sin conexion. ${offlineQueue.length} escaneo(s) guardados para sincronizar.`);
+    beep(false);
+    vibe(false);
+  }
+
+  async function readJson(res) {
+    // An HTML error page (500, proxy error) is a server error, not a lost connection.
+    try {
+      return await res.json();
+    } catch (err) {
+      return { ok: false, error: `Error del servidor (HTTP ${res.status})` };
+    }
+  }
+
+  function isNetworkError(err) {
+    // fetch only rejects (with a TypeError) when the request never got an answer.
+    return err instanceof TypeError;
+  }
+
+  async function replayOfflineQueue() {
+    if (replayingOffline || offlineQueue.length === 0) {
+      return;
+    }
+    replayingOffline = true;
+    try {
+      while (offlineQueue.length > 0) {
+        const chunk = offlineQueue.slice(0, offlineReplayChunk);
+        const res = await fetch("/api/scan/replay", {
+          method: "POST",
+          headers: { "Content-Type": "application/json" },
+          body: JSON.stringify({ scans: chunk }),
+        });
+        const data = await readJson(res);
+        if (!res.ok || !data.ok) {
+          paintNeutral(data.error || "No se pudo sincronizar la cola offline.");
+          break;
+        }
+        const synced = new Set((data.results || []).map((row) => row.idempotency_key));
+        const remaining = offlineQueue.filter((entry) => !synced.has(entry.idempotency_key));
+        if (remaining.length === offlineQueue.length) {
+          break;
+        }
+        offlineQueue = remaining;
+        saveOfflineQueue();
+        paintBatchResult(data, false);
+      }
+    } catch (err) {
+      if (!isNetworkError(err)) {
+        paintNeutral(err.message || "No se pudo sincronizar la cola offline.");
+      }
+      // keep the queue for the next attempt
+    } finally {
+      replayingOffline = false;
+      renderOfflineState();
+    }
+  }
+
+  async function sendScan(entry) {
+    const payload = {
+      ...entry,
       actor_name: currentOperator,
       override_pin: pinInput ? pinInput.value.trim() : "",
-      waiter_code: mode === "SALES" && currentWaiter ? currentWaiter.code : "",
     };
     const res = await fetch("/api/scan", {
       method: "POST",
       headers: { "Content-Type": "application/json" },
       body: JSON.stringify(payload),
     });
-    const data = await res.json();
-    const ok = res.ok && data.ok;
-    paintResult(data, !ok);
-    beep(ok);
-    vibe(ok);
+    const data = await readJson(res);
+    return { data, ok: res.ok && data.ok, batch: false };
+  }
+
+  function paintBatchResult(data, isError) {
+    feedback.className = `feedback ${isError ? "error" : "ok"}`;
+    if (isError) {
+      feedback.textContent = data.error || "Error al procesar lote";
+      return;
+    }
+    const failed = (data.results || []).filter((row) => !row.ok);
+    const details = failed.map((row) => `${row.id}: ${row.error}`).join(" | ");
+    feedback.textContent = details ? `${data.message}. ${details}` : data.message;
+    if (failed.length) {
+      feedback.className = "feedback error";
+    }
+    const last = (data.results || []).filter((row) => row.ok).pop();
+    if (last) {
+      pizzaId.textContent = last.id;
+      pizzaStatus.textContent = last.status || "-";
+      pizzaStatus.className = `status-pill status-${(last.status || "").toLowerCase()}`;
+      pizzaTime.textContent = new Date().toLocaleTimeString();
+    }
+  }
+
+  async function sendScanBatch(entries, waiterCode) {
+    const res = await fetch("/api/scan/batch", {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({
+        ids: entries.map((entry) => ({ id: entry.id, key: entry.idempotency_key })),
+        mode: mode,
+        override_pin: pinInput ? pinInput.value.trim() : "",
+        waiter_code: waiterCode,
+      }),
+    });
+    const data = await readJson(res);
+    return { data, ok: res.ok && data.ok, batch: true };
+  }
+
+  function renderScanLog() {
+    if (!scanLog) {
+      return;
+    }
+    scanLog.innerHTML = "";
+    for (const row of scanLogRows) {
+      const li = document.createElement("li");
+      li.className = `scan-log-row scan-log-${row.state}`;
+      li.textContent = `${row.id}: ${row.text}`;
+      scanLog.appendChild(li);
+    }
+  }
+
+  function setEntryStatus(entry, state, text) {
+    const existing = scanLogRows.find((row) => row.key === entry.idempotency_key);
+    if (existing) {
+      existing.state = state;
+      existing.text = text;
+    } else {
+      scanLogRows.unshift({ key: entry.idempotency_key, id: entry.id, state, text });
+      scanLogRows.splice(scanLogMax);
+    }
+    renderScanLog();
+  }
+
+  function paintJob(job) {
+    if (job.offline) {
+      for (const entry of job.entries) {
+        setEntryStatus(entry, "offline", "guardado offline");
+      }
+      queueOffline(job.entries);
+      replayOfflineQueue();
+      return;
+    }
+    const { data, ok, batch } = job.result;
+    const rows = batch && ok ? data.results || [] : job.entries.map(() => data);
+    job.entries.forEach((entry, index) => {
+      const row = rows[index] || {};
+      if (ok && row.ok) {
+        setEntryStatus(entry, "ok", row.status || (row.pizza && row.pizza.status) || "OK");
+      } else {
+        setEntryStatus(entry, "error", row.error || "Error");
+      }
+    });
+    const clean = ok && !(batch && data.failed);
+    if (batch) {
+      paintBatchResult(data, !ok);
+    } else {
+      paintResult(data, !ok);
+    }
+    beep(clean);
+    vibe(clean);
+  }
+
+  function reconcileJobs() {
+    while (finishedJobs.has(nextPaintSeq)) {
+      const job = finishedJobs.get(nextPaintSeq);
+      finishedJobs.delete(nextPaintSeq);
+      nextPaintSeq += 1;
+      paintJob(job);
+    }
+  }
+
+  async function runJob(job) {
+    inFlightCount += 1;
+    for (const entry of job.entries) {
+      inFlightCodes.add(entry.id);
+      setEntryStatus(entry, "sending", "enviando...");
+    }
+    try {
+      // Only pizzas that already wait in the offline queue join it, so they
+      // still reach the server in scan order; everything else is sent now.
+      const queuedCodes = new Set(offlineQueue.map((entry) => entry.id));
+      if (navigator.onLine === false || job.entries.some((entry) => queuedCodes.has(entry.id))) {
+        job.offline = true;
+      } else if (job.entries.length === 1) {
+        job.result = await sendScan(job.entries[0]);
+      } else {
+        job.result = await sendScanBatch(job.entries, job.waiterCode);
+      }
+    } catch (err) {
+      if (isNetworkError(err)) {
+        job.offline = true;
+      } else {
+        job.result = { data: { ok: false, error: err.message || "Error inesperado" }, ok: false, batch: false };
+      }
+    } finally {
+      inFlightCount -= 1;
+      for (const entry of job.entries) {
+        inFlightCodes.delete(entry.id);
+      }
+      finishedJobs.set(job.seq, job);
+      reconcileJobs();
+      pumpJobs();
+    }
+  }
+
+  function pumpJobs() {
+    // A code never has two requests in flight: later scans of the same
+    // pizza wait so the server always sees them in scan order.
+    const blocked = new Set();
+    let index = 0;
+    while (inFlightCount < maxInFlight && index < waitingJobs.length) {
+      const job = waitingJobs[index];
+      const codes = job.entries.map((entry) => entry.id);
+      if (codes.some((code) => inFlightCodes.has(code) || blocked.has(code))) {
+        codes.forEach((code) => blocked.add(code));
+        index += 1;
+        continue;
+      }
+      waitingJobs.splice(index, 1);
+      runJob(job);
+    }
+  }
+
+  function flushScanQueue() {
+    if (flushTimerId) {
+      clearTimeout(flushTimerId);
+      flushTimerId = null;
+    }
+    if (scanQueue.length === 0) {
+      return;
+    }
+    const job = { seq: ++jobSeq, entries: scanQueue, waiterCode: queueWaiterCode };
+    scanQueue = [];
+    waitingJobs.push(job);
+    pumpJobs();
+  }
+
+  function enqueueScan(code) {
+    const waiterCode = selectedWaiterCode();
+    if (scanQueue.length > 0 && waiterCode !== queueWaiterCode) {
+      flushScanQueue();
+    }
+    queueWaiterCode = waiterCode;
+    const entry = newScanEntry(code, waiterCode);
+    scanQueue.push(entry);
+    setEntryStatus(entry, "queued", "en cola");
+    if (scanQueue.length >= batchMaxSize) {
+      flushScanQueue();
+      return;
+    }
+    if (scanQueue.length > 1) {
+      paintNeutral(`${scanQueue.length} codigos en cola...`);
+    }
+    if (!flushTimerId) {
+      flushTimerId = setTimeout(flushScanQueue, batchWindowMs);
+    }
   }
 
   async function processCode(code) {
@@ -233,18 +546,14 @@
         keepFocus();
         return;
       }
+      flushScanQueue();
       currentWaiter = waiter;
       renderWaiterState();
       paintNeutral(`Mesero activo: ${waiter.name} (${waiter.code})`);
       if (pendingPizza) {
-        try {
-          await sendScan(pendingPizza);
-          clearPendingPizza();
-        } catch (err) {
-          paintResult({ error: "Error de red" }, true);
-          beep(false);
-          vibe(false);
-        }
+        enqueueScan(pendingPizza);
+        clearPendingPizza();
+        flushScanQueue();
       } else {
         beep(true);
         vibe(true);
@@ -262,16 +571,9 @@
       keepFocus();
       return;
     }
-    try {
-      await sendScan(input.value);
-    } catch (err) {
-      paintResult({ error: "Error de red" }, true);
-      beep(false);
-      vibe(false);
-    } finally {
-      input.value = "";
-      keepFocus();
-    }
+    enqueueScan(normalized);
+    input.value = "";
+    keepFocus();
   }
 
   function stopNativeCamera() {
@@ -508,7 +810,13 @@
     }
   });
 
+  window.addEventListener("online", replayOfflineQueue);
+
   setInterval(keepFocus, 800);
+  setInterval(replayOfflineQueue, 5000);
+  setInterval(loadWaiters, 60000);
+  renderOfflineState();
+  replayOfflineQueue();
   renderWaiterState();
   clearPendingPizza();
   loadWaiters();